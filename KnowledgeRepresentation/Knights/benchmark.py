@@ -0,0 +1,282 @@
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+import logic
+import puzzle
+import sat
+import serialize
+import simplify
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        sys.exit("Usage: python benchmark.py "
+                 f"[{'|'.join(COMMANDS)}] [arguments...]")
+    COMMANDS[sys.argv[1]](*sys.argv[2:])
+
+
+def puzzles():
+    """
+    Returns the knowledge bases of puzzle.py and the symbols asked
+    about, as (name, knowledge, queries).
+    """
+    queries = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    return [(f"puzzle {i}", knowledge, queries)
+            for i, knowledge in enumerate((puzzle.knowledge0,
+                                           puzzle.knowledge1,
+                                           puzzle.knowledge2,
+                                           puzzle.knowledge3))]
+
+
+def random_knowledge(count, clauses, rng):
+    """
+    Returns a knowledge base of `clauses` random clauses of three
+    literals over `count` symbols, and its symbols.
+    """
+    symbols = [logic.Symbol(f"P{i}") for i in range(count)]
+    knowledge = logic.And(*[
+        logic.Or(*[symbol if rng.random() < 0.5 else logic.Not(symbol)
+                   for symbol in rng.sample(symbols, 3)])
+        for _ in range(clauses)
+    ])
+    return knowledge, symbols
+
+
+def synthetic(sizes, seed):
+    """
+    Returns random knowledge bases with each number of symbols in
+    `sizes`, two clauses per symbol, as (name, knowledge, queries).
+    """
+    rng = random.Random(int(seed))
+    cases = []
+    for size in map(int, sizes.split(",")):
+        knowledge, symbols = random_knowledge(size, 2 * size, rng)
+        cases.append((f"{size} symbols", knowledge, symbols))
+    return cases
+
+
+def compare(cases, checks):
+    """
+    Times each of `checks`, (label, model_check function) pairs, asking
+    every query of every case, and checks that they agree.
+    """
+    print(f"{'knowledge':<14}{'queries':>8}"
+          + "".join(f"{label + ' (s)':>18}" for label, _ in checks)
+          + f"{'speedup':>9}")
+    mismatches = 0
+    for name, knowledge, queries in cases:
+        timings = []
+        answers = []
+        for _, check in checks:
+            start = time.perf_counter()
+            answers.append([check(knowledge, query) for query in queries])
+            timings.append(time.perf_counter() - start)
+        mismatches += any(answer != answers[0] for answer in answers)
+        print(f"{name:<14}{len(queries):>8}"
+              + "".join(f"{elapsed:>18.4f}" for elapsed in timings)
+              + f"{timings[0] / timings[-1]:>9.1f}")
+    print(f"{mismatches} knowledge bases where the answers differ.")
+
+
+def truth_tables(sizes="8,12,16", seed="0"):
+    """
+    Compares model checking one model at a time with evaluating truth
+    tables of every model at once, on the puzzles and on random
+    knowledge bases with each number of symbols in `sizes`.
+    """
+    compare(puzzles() + synthetic(sizes, seed), [
+        ("enumerate", logic.model_check_enumerate),
+        ("truth tables", logic.model_check),
+    ])
+
+
+def sat_solver(sizes="8,12,16,20", large="100,300", seed="0"):
+    """
+    Compares truth tables with the SAT solver on the puzzles and on
+    random knowledge bases with each number of symbols in `sizes`,
+    then times the SAT solver alone on the `large` ones, too big for
+    truth tables.
+    """
+    compare(puzzles() + synthetic(sizes, seed), [
+        ("truth tables", logic.model_check),
+        ("sat", sat.model_check),
+    ])
+    print(f"{'knowledge':<14}{'queries':>8}{'sat (s)':>18}{'entailed':>10}")
+    for name, knowledge, queries in synthetic(large, seed):
+        start = time.perf_counter()
+        entailed = sum(sat.model_check(knowledge, query) for query in queries)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<14}{len(queries):>8}{elapsed:>18.4f}{entailed:>10}")
+
+
+def batch(sizes="8,12,16,20", large="100,300", seed="0"):
+    """
+    Compares asking whether each literal of the puzzles and of random
+    knowledge bases is entailed one query at a time with asking for all
+    of them in one call, with truth tables and with the SAT solver.
+    The truth tables are skipped for the `large` knowledge bases.
+    """
+    checks = [
+        ("each", logic.model_check, False),
+        ("batch", logic.model_check_many, True),
+        ("sat each", sat.model_check, False),
+        ("sat batch", sat.model_check_many, True),
+    ]
+    print(f"{'knowledge':<14}{'queries':>8}"
+          + "".join(f"{label + ' (s)':>15}" for label, _, _ in checks)
+          + f"{'speedup':>9}{'sat speedup':>13}")
+    cases = ([(case, checks) for case in puzzles() + synthetic(sizes, seed)]
+             + [(case, checks[2:]) for case in synthetic(large, seed)])
+    mismatches = 0
+    for (name, knowledge, symbols), case_checks in cases:
+        queries = symbols + [logic.Not(symbol) for symbol in symbols]
+        timings = {}
+        answers = []
+        for label, check, many in case_checks:
+            start = time.perf_counter()
+            if many:
+                entailed = check(knowledge, queries)
+            else:
+                entailed = [query for query in queries
+                            if check(knowledge, query)]
+            timings[label] = time.perf_counter() - start
+            answers.append(entailed)
+        mismatches += any(answer != answers[0] for answer in answers)
+
+        row = f"{name:<14}{len(queries):>8}"
+        for label, _, _ in checks:
+            row += (f"{timings[label]:>15.4f}" if label in timings
+                    else f"{'-':>15}")
+        if "each" in timings:
+            row += f"{timings['each'] / timings['batch']:>9.1f}"
+        else:
+            row += f"{'-':>9}"
+        row += f"{timings['sat each'] / timings['sat batch']:>13.1f}"
+        print(row)
+    print(f"{mismatches} knowledge bases where the answers differ.")
+
+
+def build(count="2000", clauses="20000", seed="0"):
+    """
+    Times building a random knowledge base of `clauses` clauses over
+    `count` symbols twice, comparing and hashing the two and finding
+    their symbols, and measures the memory the two take.
+    """
+    def build_twice():
+        return [random_knowledge(int(count), int(clauses),
+                                 random.Random(int(seed)))[0]
+                for _ in range(2)]
+
+    start = time.perf_counter()
+    first, second = build_twice()
+    build_time = time.perf_counter() - start
+    del first, second
+
+    tracemalloc.start()
+    first, second = build_twice()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    compare_time = math.inf
+    for _ in range(5):
+        start = time.perf_counter()
+        equal = first == second
+        hash(first)
+        hash(second)
+        compare_time = min(compare_time, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    symbols = first.symbols()
+    symbols_time = time.perf_counter() - start
+
+    print(f"Built twice in {build_time:.3f}s, taking {memory / 1e6:.1f} MB.")
+    print(f"Compared and hashed in {compare_time * 1e3:.3f} ms, "
+          f"{'equal' if equal else 'not equal'}.")
+    print(f"Found {len(symbols)} symbols in {symbols_time * 1e3:.3f} ms.")
+
+
+def simplification(sizes="8,12,16", seed="0"):
+    """
+    Reports the nodes of the puzzles and of random knowledge bases
+    before and after simplifying them and in conjunctive normal form,
+    and times asking for every literal with truth tables before and
+    after simplifying, checking the answers agree.
+    """
+    print(f"{'knowledge':<14}{'nodes':>8}{'simplified':>12}{'cnf':>8}"
+          f"{'before (s)':>12}{'after (s)':>11}{'same':>6}")
+    for name, knowledge, symbols in puzzles() + synthetic(sizes, seed):
+        queries = symbols + [logic.Not(symbol) for symbol in symbols]
+        simplified = simplify.simplify(knowledge)
+
+        start = time.perf_counter()
+        expected = logic.model_check_many(knowledge, queries)
+        before = time.perf_counter() - start
+        start = time.perf_counter()
+        entailed = logic.model_check_many(simplified, queries)
+        after = time.perf_counter() - start
+
+        print(f"{name:<14}{simplify.size(knowledge):>8}"
+              f"{simplify.size(simplified):>12}"
+              f"{simplify.size(simplify.cnf(knowledge)):>8}"
+              f"{before:>12.4f}{after:>11.4f}"
+              f"{'yes' if entailed == expected else 'NO':>6}")
+
+
+def storage(sizes="25000,50000,100000", seed="0"):
+    """
+    Times building random knowledge bases of each number of clauses in
+    `sizes` in Python, and reading them back from formula() text, JSON
+    and the binary format, reporting microseconds per clause so that
+    loading can be seen to take linear time.
+    """
+    print(f"{'clauses':>8}{'build':>8}{'parse':>8}{'json':>8}{'binary':>8}"
+          f"{'text (MB)':>11}{'json (MB)':>11}{'binary (MB)':>13}{'same':>6}")
+    for size in map(int, sizes.split(",")):
+        rng = random.Random(int(seed))
+        start = time.perf_counter()
+        knowledge, _ = random_knowledge(size // 5, size, rng)
+        build_time = time.perf_counter() - start
+
+        text = knowledge.formula()
+        data = json.dumps(serialize.to_json(knowledge), ensure_ascii=False)
+        binary = serialize.to_bytes(knowledge)
+
+        # Without the original, loading builds every sentence afresh
+        del knowledge
+        timings = []
+        same = True
+        for load, source in ((serialize.parse, text),
+                             (lambda data: serialize.from_json(
+                                 json.loads(data)), data),
+                             (serialize.from_bytes, binary)):
+            start = time.perf_counter()
+            loaded = load(source)
+            timings.append(time.perf_counter() - start)
+            same = same and serialize.to_bytes(loaded) == binary
+            del loaded
+
+        print(f"{size:>8}{build_time / size * 1e6:>8.2f}"
+              + "".join(f"{elapsed / size * 1e6:>8.2f}"
+                        for elapsed in timings)
+              + f"{len(text.encode()) / 1e6:>11.2f}"
+              f"{len(data.encode()) / 1e6:>11.2f}{len(binary) / 1e6:>13.2f}"
+              f"{'yes' if same else 'NO':>6}")
+
+
+COMMANDS = {
+    "truthtables": truth_tables,
+    "sat": sat_solver,
+    "batch": batch,
+    "build": build,
+    "simplify": simplification,
+    "storage": storage,
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,58 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    A logical sentence. Sentences cannot be changed once built, and
+    structurally equal sentences are the same object, so they compare
+    and hash by identity and share their cached hash and symbols.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every sentence in use, by its class and parts
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def make(cls, parts, fields):
+        """
+        Returns the sentence of this class made of `parts`, with the
+        attributes in `fields`, creating it if there is none yet.
+        """
+        key = (cls,) + parts
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            object.__setattr__(sentence, "_hash", hash(key))
+            object.__setattr__(sentence, "_symbols", None)
+            for name, value in fields:
+                object.__setattr__(sentence, name, value)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences cannot be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences cannot be changed")
+
+    def __hash__(self):
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # Unpickle through the constructor, so the sentence is interned
+        return (type(self), self.operands())
+
+    def operands(self):
+        """Returns the sentences the logical sentence is made of."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -12,8 +63,27 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozen set of all symbols in the logical sentence."""
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset().union(
+                *[operand.symbols() for operand in self.operands()]
+            ))
+        return self._symbols
+
+    def truth_table(self, columns):
+        """
+        Returns the truth table of the logical sentence as an integer
+        whose bit m is set if the sentence is true in model m, given
+        the truth table of each symbol in `columns`.
+        """
+        raise Exception("nothing to evaluate")
+
+    def encode(self, cnf):
+        """
+        Returns a literal of `cnf`, a sat.CNF, that is true exactly when
+        the logical sentence is, adding the clauses that define it.
+        """
+        raise Exception("nothing to encode")
 
     @classmethod
     def validate(cls, sentence):
@@ -34,7 +104,7 @@ class Sentence():
                         return False
                     count -= 1
             return count == 0
-        if not len(s) or s.isalpha() or (
+        if not len(s) or s.isalpha() or s in ("⊤", "⊥") or (
             s[0] == "(" and s[-1] == ")" and balanced(s[1:-1])
         ):
             return s
@@ -43,15 +113,14 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.make((name,), (("name", name),
+                                  ("_symbols", frozenset((name,)))))
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -62,23 +131,28 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def encode(self, cnf):
+        return cnf.variable(self.name)
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def truth_table(self, columns):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        return cls.make((operand,), (("operand", operand),))
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def operands(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +163,24 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def truth_table(self, columns):
+        # Bits past the last model are ignored, so need not be cleared
+        return ~self.operand.truth_table(columns)
+
+    def encode(self, cnf):
+        return -cnf.literal(self.operand)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return cls.make(conjuncts, (("conjuncts", conjuncts),))
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def operands(self):
+        return self.conjuncts
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -113,36 +188,43 @@ class And(Sentence):
         )
         return f"And({conjunctions})"
 
-    def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
-
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
+        # The empty conjunction is always true
+        if not self.conjuncts:
+            return "⊤"
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def truth_table(self, columns):
+        table = -1
+        for conjunct in self.conjuncts:
+            table &= conjunct.truth_table(columns)
+        return table
+
+    def encode(self, cnf):
+        literals = [cnf.literal(conjunct) for conjunct in self.conjuncts]
+        literal = cnf.new_variable()
+        for conjunct in literals:
+            cnf.add([-literal, conjunct])
+        cnf.add([literal] + [-conjunct for conjunct in literals])
+        return literal
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.make(disjuncts, (("disjuncts", disjuncts),))
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def operands(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -152,29 +234,41 @@ class Or(Sentence):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
+        # The empty disjunction is always false
+        if not self.disjuncts:
+            return "⊥"
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def truth_table(self, columns):
+        table = 0
+        for disjunct in self.disjuncts:
+            table |= disjunct.truth_table(columns)
+        return table
+
+    def encode(self, cnf):
+        literals = [cnf.literal(disjunct) for disjunct in self.disjuncts]
+        literal = cnf.new_variable()
+        for disjunct in literals:
+            cnf.add([literal, -disjunct])
+        cnf.add([-literal] + literals)
+        return literal
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.make((antecedent, consequent),
+                        (("antecedent", antecedent),
+                         ("consequent", consequent)))
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def operands(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +282,30 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def truth_table(self, columns):
+        return (~self.antecedent.truth_table(columns)
+                | self.consequent.truth_table(columns))
+
+    def encode(self, cnf):
+        antecedent = cnf.literal(self.antecedent)
+        consequent = cnf.literal(self.consequent)
+        literal = cnf.new_variable()
+        cnf.add([-literal, -antecedent, consequent])
+        cnf.add([literal, antecedent])
+        cnf.add([literal, -consequent])
+        return literal
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.make((left, right), (("left", left), ("right", right)))
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def operands(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,16 +317,74 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def truth_table(self, columns):
+        return ~(self.left.truth_table(columns)
+                 ^ self.right.truth_table(columns))
+
+    def encode(self, cnf):
+        left = cnf.literal(self.left)
+        right = cnf.literal(self.right)
+        literal = cnf.new_variable()
+        cnf.add([-literal, -left, right])
+        cnf.add([-literal, left, -right])
+        cnf.add([literal, left, right])
+        cnf.add([literal, -left, -right])
+        return literal
+
+
+def symbol_columns(symbols):
+    """
+    Returns the truth table of each of the symbols over every model of
+    them, where model m makes the symbol with index i in sorted order
+    true if bit i of m is set, and the number of models.
+    """
+    columns = {}
+    count = 1 << len(symbols)
+    for i, symbol in enumerate(sorted(symbols)):
+        # 2^i models with the symbol false, then 2^i with it true,
+        # repeated until every model is covered
+        width = 2 << i
+        column = ((1 << (1 << i)) - 1) << (1 << i)
+        while width < count:
+            column |= column << width
+            width *= 2
+        columns[symbol] = column
+    return columns, count
 
 
 def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    """
+    Checks if knowledge base entails query, by evaluating both in
+    every model at once: the query is entailed if no model where the
+    knowledge base is true makes it false.
+    """
+    symbols = knowledge.symbols() | query.symbols()
+    columns, count = symbol_columns(symbols)
+    models = (1 << count) - 1
+    return (knowledge.truth_table(columns)
+            & ~query.truth_table(columns) & models) == 0
+
+
+def model_check_many(knowledge, queries):
+    """
+    Returns the queries the knowledge base entails, in order, finding
+    the models where the knowledge base is true only once.
+    """
+    symbols = knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    )
+    columns, count = symbol_columns(symbols)
+    models = knowledge.truth_table(columns) & ((1 << count) - 1)
+    return [query for query in queries
+            if not models & ~query.truth_table(columns)]
+
+
+def model_check_enumerate(knowledge, query):
+    """Checks if knowledge base entails query, one model at a time."""
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +415,7 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
@@ -0,0 +1,379 @@
+"""
+Entailment by Boolean satisfiability
+"""
+import heapq
+
+
+class CNF():
+    """
+    Clauses over numbered variables, built from logical sentences by
+    the Tseitin transformation: every subsentence gets a variable,
+    constrained to be true exactly when the subsentence is. A literal
+    is a variable's number, or its negation for the variable's opposite.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+        self.literals = {}
+
+    def variable(self, name):
+        """
+        Returns the variable of the symbol called `name`.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def add(self, clause):
+        self.clauses.append(clause)
+
+    def literal(self, sentence):
+        """
+        Returns the literal equivalent to a logical sentence, encoding
+        each distinct subsentence only once.
+        """
+        if sentence not in self.literals:
+            self.literals[sentence] = sentence.encode(self)
+        return self.literals[sentence]
+
+
+class Solver():
+    """
+    A conflict-driven clause learning SAT solver: it assigns variables
+    one decision at a time, follows each decision's consequences by
+    unit propagation over two watched literals per clause, and learns
+    a clause from each conflict that forbids its cause, then jumps back
+    to the decision that clause depends on.
+    """
+
+    def __init__(self, count, clauses):
+        # Each literal's value (1 true, -1 false, 0 unassigned), and
+        # the clauses watching it, indexed by literal + count
+        self.count = count
+        self.values = [0] * (2 * count + 1)
+        self.watches = [[] for _ in range(2 * count + 1)]
+
+        # Each variable's decision level, the clause that forced it and
+        # the value it last had
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+        self.phases = [-1] * (count + 1)
+
+        # Conflicts each variable took part in, recent ones weighing
+        # most, and a heap of (-activity, variable) that may also hold
+        # outdated entries, to pick the most active unassigned variable
+        self.activity = [0.0] * (count + 1)
+        self.increment = 1.0
+        self.order = [(0.0, variable) for variable in range(1, count + 1)]
+
+        # Assigned literals in order, where each decision level starts,
+        # and how many of them have been propagated
+        self.trail = []
+        self.decisions = []
+        self.propagated = 0
+
+        self.consistent = True
+        for clause in clauses:
+            self.add(clause)
+
+    def add(self, clause):
+        """
+        Adds a clause before solving starts.
+        """
+        clause = list(dict.fromkeys(clause))
+        literals = set(clause)
+        if any(-literal in literals for literal in clause):
+            return
+        if not clause:
+            self.consistent = False
+        elif len(clause) == 1:
+            value = self.value(clause[0])
+            if value == -1:
+                self.consistent = False
+            elif value == 0:
+                self.assign(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        self.watches[clause[0] + self.count].append(clause)
+        self.watches[clause[1] + self.count].append(clause)
+
+    def value(self, literal):
+        return self.values[literal + self.count]
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[literal + self.count] = 1
+        self.values[self.count - literal] = -1
+        self.levels[variable] = len(self.decisions)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal left as the only one that can satisfy a
+        clause, until none are. Returns a clause with every literal
+        false if there is one, else None.
+        """
+        values = self.values
+        count = self.count
+        watches = self.watches
+        trail = self.trail
+        while self.propagated < len(trail):
+            false = -trail[self.propagated]
+            self.propagated += 1
+            watching = watches[false + count]
+            kept = 0
+            i = 0
+            end = len(watching)
+            while i < end:
+                clause = watching[i]
+                i += 1
+
+                # Keep the false literal second
+                first = clause[0]
+                if first == false:
+                    first = clause[0] = clause[1]
+                    clause[1] = false
+                first_value = values[first + count]
+                if first_value == 1:
+                    watching[kept] = clause
+                    kept += 1
+                    continue
+
+                # Watch another literal that is not false, if any
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if values[literal + count] != -1:
+                        clause[1] = literal
+                        clause[k] = false
+                        watches[literal + count].append(clause)
+                        break
+                else:
+                    watching[kept] = clause
+                    kept += 1
+                    if first_value == -1:
+                        # Conflict: keep the clauses not yet visited
+                        watching[kept:kept] = watching[i:end]
+                        del watching[kept + end - i:]
+                        return clause
+                    self.assign(first, clause)
+            del watching[kept:]
+        return None
+
+    def simplify(self):
+        """
+        Drops the clauses made true by the assignments of level 0 and
+        the literals they made false, such as the definitions of
+        subsentences the knowledge base asserts, assigning any literal
+        left alone. Returns False if a clause is left empty.
+        """
+        count = self.count
+        clauses = {}
+        for watching in self.watches:
+            for clause in watching:
+                clauses[id(clause)] = clause
+        self.watches = [[] for _ in range(2 * count + 1)]
+        for clause in clauses.values():
+            if any(self.values[literal + count] == 1 for literal in clause):
+                continue
+            clause = [literal for literal in clause
+                      if not self.values[literal + count]]
+            if not clause:
+                return False
+            if len(clause) == 1:
+                self.assign(clause[0], None)
+            else:
+                self.watch(clause)
+        return True
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, resolving it with
+        the reasons of the current level's assignments until one
+        literal of that level is left (the first unique implication
+        point), and the level to jump back to.
+        """
+        level = len(self.decisions)
+        levels = self.levels
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen:
+                    continue
+                if levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # The most recent assignment of this level in the clause
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal assigned last after the asserting one
+        latest = max(range(1, len(learned)),
+                     key=lambda i: levels[abs(learned[i])])
+        learned[1], learned[latest] = learned[latest], learned[1]
+        return learned, levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-activity, variable)
+                          for variable, activity in enumerate(self.activity)
+                          if variable]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """
+        Undoes the assignments of every decision level above `level`.
+        """
+        if len(self.decisions) <= level:
+            return
+        start = self.decisions[level]
+        count = self.count
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = 1 if literal > 0 else -1
+            self.values[literal + count] = 0
+            self.values[count - literal] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.decisions[level:]
+        self.propagated = start
+
+    def decide(self):
+        """
+        Returns the unassigned variable most active in recent conflicts
+        as the literal of its last value, or None if all are assigned.
+        """
+        # Every unassigned variable has an entry with its activity
+        if len(self.order) > 4 * self.count:
+            self.order = [(-self.activity[variable], variable)
+                          for variable in range(1, self.count + 1)
+                          if not self.values[variable + self.count]]
+            heapq.heapify(self.order)
+        while self.order:
+            activity, variable = heapq.heappop(self.order)
+            if (not self.values[variable + self.count]
+                    and -activity == self.activity[variable]):
+                return variable if self.phases[variable] == 1 else -variable
+        return None
+
+    def solve(self):
+        """
+        Returns True if the clauses can all be satisfied, leaving a
+        satisfying assignment in values, and False otherwise.
+        """
+        if not self.consistent:
+            return False
+
+        conflicts = 0
+        restart = 100
+        simplified = -1
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.decisions:
+                    return False
+                conflicts += 1
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                self.increment /= 0.95
+                continue
+
+            # Drop what level 0 settles whenever it has grown
+            if not self.decisions and len(self.trail) > simplified:
+                simplified = len(self.trail)
+                if not self.simplify():
+                    return False
+                continue
+
+            # Start over now and then, keeping what was learned
+            if conflicts >= restart:
+                conflicts = 0
+                restart = int(restart * 1.5)
+                self.backtrack(0)
+                continue
+
+            literal = self.decide()
+            if literal is None:
+                return True
+            self.decisions.append(len(self.trail))
+            self.assign(literal, None)
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that no
+    assignment makes the knowledge base true and the query false.
+    """
+    cnf = CNF()
+    cnf.add([cnf.literal(knowledge)])
+    cnf.add([-cnf.literal(query)])
+    return not Solver(cnf.count, cnf.clauses).solve()
+
+
+def model_check_many(knowledge, queries):
+    """
+    Returns the queries the knowledge base entails, in order. A query
+    false in any model of the knowledge base found along the way is not
+    entailed, so only the queries true in every model found so far
+    need a search of their own.
+    """
+    cnf = CNF()
+    cnf.add([cnf.literal(knowledge)])
+    literals = [cnf.literal(query) for query in queries]
+
+    solver = Solver(cnf.count, cnf.clauses)
+    if not solver.solve():
+        return list(queries)
+    unchecked = {literal for literal in literals if solver.value(literal) == 1}
+    entailed = set()
+    while unchecked:
+        literal = unchecked.pop()
+        solver = Solver(cnf.count, cnf.clauses + [[-literal]])
+        if solver.solve():
+            unchecked = {other for other in unchecked
+                         if solver.value(other) == 1}
+        else:
+            entailed.add(literal)
+    return [query for query, literal in zip(queries, literals)
+            if literal in entailed]
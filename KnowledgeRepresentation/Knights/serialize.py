@@ -0,0 +1,354 @@
+"""
+Reading and writing logical sentences
+"""
+import json
+import re
+import struct
+import sys
+from array import array
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+MAGIC = b"LOGICDAG"
+VERSION = 1
+
+# Magic, version, number of symbols, number of node record integers,
+# bytes of symbol names, then the index of the root node
+HEADER = struct.Struct("<8sIIIII")
+
+# Each sentence class by the operator formula() writes for it
+OPERATORS = {
+    Not: "¬",
+    And: "∧",
+    Or: "∨",
+    Implication: "=>",
+    Biconditional: "<=>",
+}
+CLASSES = {operator: cls for cls, operator in OPERATORS.items()}
+
+# Number of operands of each class that takes a fixed number
+ARITIES = {Not: 1, Implication: 2, Biconditional: 2}
+
+# Kind of each node record in the binary format, by sentence class
+KINDS = [Symbol, Not, And, Or, Implication, Biconditional]
+CODES = {cls: code for code, cls in enumerate(KINDS)}
+
+# Binding strength of each operator, and whether it groups from the
+# right, as in A => B => C being A => (B => C)
+PRECEDENCE = {"¬": 5, "∧": 4, "∨": 3, "=>": 2, "<=>": 1}
+RIGHT = {"=>"}
+
+# Operators whose chains make one sentence, as A ∧ B ∧ C is And(A, B, C)
+CHAINS = {"∧", "∨"}
+
+# The sentences formula() writes as constants: the empty conjunction,
+# always true, and the empty disjunction, always false
+CONSTANTS = {"⊤": And(), "⊥": Or()}
+
+# An operator, parenthesis or constant, a symbol name (words separated
+# by spaces, without parentheses, operators or constants), or any other
+# character, which is an error
+NAME_CHARACTER = r"(?:[^\s()¬∧∨⊤⊥<=]|[<=](?!=?>))"
+TOKEN = re.compile(
+    rf"\s*(?:(<=>|=>|[()¬∧∨⊤⊥])|({NAME_CHARACTER}+(?:\s+{NAME_CHARACTER}+)*)"
+    r"|(\S))"
+)
+
+
+def parse(text):
+    """
+    Returns the sentence written in `text` in the syntax of formula():
+    symbol names, the constants ⊤ and ⊥, ¬, ∧, ∨, => and <=>, and
+    parentheses. Without parentheses ¬ binds tightest, then ∧, ∨, =>
+    and <=>, and a chain of ∧ or of ∨ is one conjunction or
+    disjunction. Raises ValueError if `text` is not a sentence.
+
+    Text reads back every sentence simplify() produces. A conjunction
+    or disjunction of one operand, which it never produces, is written
+    as that operand alone and parses back as the operand.
+    """
+    operands = []
+    operators = []
+    symbols = {}
+    expect_operand = True
+    for number, (token, name, other) in enumerate(TOKEN.findall(text)):
+        if other:
+            raise ValueError(f"unexpected {other!r} at position "
+                             f"{position(text, number)}")
+
+        if name or token in CONSTANTS or token in ("(", "¬"):
+            if not expect_operand:
+                raise ValueError(f"expected an operator at position "
+                                 f"{position(text, number)}")
+            if name:
+                if name not in symbols:
+                    symbols[name] = Symbol(name)
+                operands.append(symbols[name])
+                expect_operand = False
+            elif token in CONSTANTS:
+                operands.append(CONSTANTS[token])
+                expect_operand = False
+            else:
+                operators.append([token, 1])
+            continue
+
+        if expect_operand:
+            raise ValueError(f"expected a sentence at position "
+                             f"{position(text, number)}")
+        if token == ")":
+            while operators and operators[-1][0] != "(":
+                reduce(operators.pop(), operands)
+            if not operators:
+                raise ValueError(f"unmatched ')' at position "
+                                 f"{position(text, number)}")
+            operators.pop()
+            continue
+
+        # Finish the operators on the left that bind more tightly, or
+        # as tightly unless they group from the right or form a chain
+        precedence = PRECEDENCE[token]
+        while operators and operators[-1][0] != "(":
+            top = PRECEDENCE[operators[-1][0]]
+            if top > precedence or (top == precedence and token not in RIGHT
+                                    and token not in CHAINS):
+                reduce(operators.pop(), operands)
+            else:
+                break
+        if operators and operators[-1][0] == token and token in CHAINS:
+            operators[-1][1] += 1
+        else:
+            operators.append([token, 2])
+        expect_operand = True
+
+    if expect_operand:
+        raise ValueError("expected a sentence at the end")
+    while operators:
+        if operators[-1][0] == "(":
+            raise ValueError("unmatched '('")
+        reduce(operators.pop(), operands)
+    return operands[0]
+
+
+def position(text, number):
+    """
+    Returns where the token with index `number` of `text` starts.
+    """
+    for i, match in enumerate(TOKEN.finditer(text)):
+        if i == number:
+            return match.start(match.lastindex)
+
+
+def reduce(operator, operands):
+    """
+    Replaces the operands of an operator, [token, arity], on top of
+    the operand stack with the sentence applying it to them.
+    """
+    token, arity = operator
+    parts = operands[-arity:]
+    del operands[-arity:]
+    operands.append(CLASSES[token](*parts))
+
+
+def nodes(sentence):
+    """
+    Returns the distinct subsentences of a sentence, each after the
+    ones it is made of and the sentence itself last, and the index of
+    each in that list.
+    """
+    index = {}
+    order = []
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in index:
+            continue
+        operands = node.operands()
+        if expanded or not operands:
+            index[node] = len(order)
+            order.append(node)
+        else:
+            stack.append((node, True))
+            stack.extend((operand, False) for operand in reversed(operands)
+                         if operand not in index)
+    return order, index
+
+
+def to_json(sentence):
+    """
+    Returns a list representing a sentence for JSON: each distinct
+    subsentence once, as a symbol's name or as a list of an operator
+    and the positions in the list of its operands, the sentence last.
+    """
+    order, index = nodes(sentence)
+    return [node.name if isinstance(node, Symbol)
+            else [OPERATORS[type(node)]]
+            + [index[operand] for operand in node.operands()]
+            for node in order]
+
+
+def from_json(data):
+    """
+    Returns the sentence represented by a list from to_json. Raises
+    ValueError if `data` does not represent a sentence.
+    """
+    if not isinstance(data, list):
+        raise ValueError("not a list of sentence nodes")
+    built = []
+    for number, node in enumerate(data):
+        if isinstance(node, str):
+            built.append(Symbol(node))
+            continue
+        if (not isinstance(node, list) or not node
+                or not isinstance(node[0], str) or node[0] not in CLASSES):
+            raise ValueError(f"node {number} is neither a symbol name "
+                             "nor an operator with its operands")
+        cls = CLASSES[node[0]]
+        check_arity(cls, len(node) - 1, number)
+        built.append(cls(*[operand(built, i, number) for i in node[1:]]))
+    if not built:
+        raise ValueError("no sentence")
+    return built[-1]
+
+
+def check_arity(cls, arity, number):
+    """
+    Raises ValueError if node `number`, of class `cls`, cannot have
+    `arity` operands.
+    """
+    if arity != ARITIES.get(cls, arity) or arity < 0:
+        raise ValueError(f"node {number}, {cls.__name__}, cannot have "
+                         f"{arity} operands")
+
+
+def operand(built, index, number):
+    """
+    Returns the node built at `index` for an operand of node `number`,
+    raising ValueError unless it is one built before it.
+    """
+    if type(index) is not int or not 0 <= index < len(built):
+        raise ValueError(f"node {number} refers to {index!r}, "
+                         "which is not an earlier node")
+    return built[index]
+
+
+def to_bytes(sentence):
+    """
+    Returns the binary representation of a sentence: a header, the
+    symbol names as UTF-8 with their offsets, then a record of integers
+    for each distinct subsentence after those it is made of, holding
+    its kind, the number of operands of a conjunction or disjunction,
+    and the positions of its operands (or of a symbol's name).
+    """
+    order, index = nodes(sentence)
+    names = []
+    records = array("i")
+    for node in order:
+        kind = CODES[type(node)]
+        records.append(kind)
+        if kind == 0:
+            records.append(len(names))
+            names.append(node.name.encode("utf-8"))
+            continue
+        operands = node.operands()
+        if isinstance(node, (And, Or)):
+            records.append(len(operands))
+        records.extend(index[operand] for operand in operands)
+
+    offsets = array("i", [0])
+    total = 0
+    for name in names:
+        total += len(name)
+        offsets.append(total)
+    if sys.byteorder == "big":
+        offsets.byteswap()
+        records.byteswap()
+    return b"".join([
+        HEADER.pack(MAGIC, VERSION, len(names), len(records), total,
+                    len(order) - 1),
+        offsets.tobytes(), b"".join(names), records.tobytes(),
+    ])
+
+
+def from_bytes(data):
+    """
+    Returns the sentence represented by bytes from to_bytes. Raises
+    ValueError if `data` does not represent a sentence.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("not a sentence file")
+    magic, version, count, length, total, root = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a sentence file")
+    if len(data) != HEADER.size + 4 * (count + 1) + total + 4 * length:
+        raise ValueError("sentence file is truncated or has extra bytes")
+
+    position = HEADER.size
+    offsets = array("i", data[position:position + 4 * (count + 1)])
+    position += 4 * (count + 1)
+    names = data[position:position + total]
+    position += total
+    records = array("i", data[position:position + 4 * length])
+    if sys.byteorder == "big":
+        offsets.byteswap()
+        records.byteswap()
+    if offsets[0] != 0 or offsets[-1] != total or any(
+            offsets[k] > offsets[k + 1] for k in range(count)):
+        raise ValueError("symbol name offsets are out of order")
+
+    built = []
+    i = 0
+    while i < length:
+        number = len(built)
+        if not 0 <= records[i] < len(KINDS) or i + 1 >= length:
+            raise ValueError(f"node {number} is not a valid record")
+        cls = KINDS[records[i]]
+        if cls is Symbol:
+            name = records[i + 1]
+            if not 0 <= name < count:
+                raise ValueError(f"node {number} refers to symbol name "
+                                 f"{name}, which does not exist")
+            built.append(Symbol(
+                names[offsets[name]:offsets[name + 1]].decode("utf-8")
+            ))
+            i += 2
+            continue
+        if cls is And or cls is Or:
+            arity = records[i + 1]
+            i += 2
+        else:
+            arity = ARITIES[cls]
+            i += 1
+        check_arity(cls, arity, number)
+        if i + arity > length:
+            raise ValueError(f"node {number} runs past the last record")
+        built.append(cls(*[operand(built, j, number)
+                           for j in records[i:i + arity]]))
+        i += arity
+    if not 0 <= root < len(built):
+        raise ValueError(f"root {root} is not a node")
+    return built[root]
+
+
+def save(sentence, filename):
+    """
+    Writes a sentence to a file: as JSON if its name ends in .json,
+    and otherwise in the binary format.
+    """
+    if filename.endswith(".json"):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(to_json(sentence), f, ensure_ascii=False,
+                      separators=(",", ":"))
+    else:
+        with open(filename, "wb") as f:
+            f.write(to_bytes(sentence))
+
+
+def load(filename):
+    """
+    Reads a sentence written by save().
+    """
+    if filename.endswith(".json"):
+        with open(filename, encoding="utf-8") as f:
+            return from_json(json.load(f))
+    with open(filename, "rb") as f:
+        return from_bytes(f.read())
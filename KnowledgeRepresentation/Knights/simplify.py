@@ -0,0 +1,240 @@
+"""
+Simplification and normal forms of logical sentences
+"""
+import itertools
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# The empty conjunction is always true, and the empty disjunction
+# always false; formula() writes them as ⊤ and ⊥
+TRUE = And()
+FALSE = Or()
+
+# Clauses with at most this many operands look for clauses that
+# subsume them among their subsets; longer ones compare with each
+# shorter clause kept
+SUBSET_LIMIT = 8
+
+
+def size(sentence, sizes=None):
+    """
+    Returns the number of nodes in the tree of a sentence, counting a
+    subsentence each time it appears, as evaluating it does.
+    """
+    if sizes is None:
+        sizes = {}
+    if sentence not in sizes:
+        sizes[sentence] = 1 + sum(size(operand, sizes)
+                                  for operand in sentence.operands())
+    return sizes[sentence]
+
+
+def simplify(sentence, cache=None):
+    """
+    Returns an equivalent sentence with nested conjunctions and
+    disjunctions flattened, repeated operands removed, TRUE and FALSE
+    folded away, and operands subsumed by others (such as the clause
+    A ∨ B next to the clause A in a conjunction) eliminated.
+    """
+    if cache is None:
+        cache = {}
+    if sentence in cache:
+        return cache[sentence]
+
+    if isinstance(sentence, Symbol):
+        simplified = sentence
+    elif isinstance(sentence, Not):
+        simplified = negate(simplify(sentence.operand, cache))
+    elif isinstance(sentence, And):
+        simplified = combine(And, Or, [simplify(conjunct, cache)
+                                       for conjunct in sentence.conjuncts])
+    elif isinstance(sentence, Or):
+        simplified = combine(Or, And, [simplify(disjunct, cache)
+                                       for disjunct in sentence.disjuncts])
+    elif isinstance(sentence, Implication):
+        antecedent = simplify(sentence.antecedent, cache)
+        consequent = simplify(sentence.consequent, cache)
+        if antecedent is FALSE or consequent is TRUE or antecedent is consequent:
+            simplified = TRUE
+        elif antecedent is TRUE:
+            simplified = consequent
+        elif consequent is FALSE:
+            simplified = negate(antecedent)
+        else:
+            simplified = Implication(antecedent, consequent)
+    elif isinstance(sentence, Biconditional):
+        left = simplify(sentence.left, cache)
+        right = simplify(sentence.right, cache)
+        if left is right:
+            simplified = TRUE
+        elif left is negate(right):
+            simplified = FALSE
+        elif left is TRUE or right is TRUE:
+            simplified = right if left is TRUE else left
+        elif left is FALSE or right is FALSE:
+            simplified = negate(right if left is FALSE else left)
+        else:
+            simplified = Biconditional(left, right)
+    else:
+        raise TypeError("must be a logical sentence")
+
+    cache[sentence] = simplified
+    return simplified
+
+
+def negate(sentence):
+    """
+    Returns the negation of a simplified sentence, removing double
+    negations and swapping TRUE and FALSE.
+    """
+    if sentence is TRUE:
+        return FALSE
+    if sentence is FALSE:
+        return TRUE
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def combine(kind, dual, operands):
+    """
+    Returns the simplified conjunction (kind And, dual Or) or
+    disjunction (kind Or, dual And) of simplified operands.
+    """
+    # Empty And is TRUE, the identity of And; empty Or is FALSE
+    identity = kind()
+    absorbing = dual()
+
+    flat = []
+    for operand in operands:
+        if isinstance(operand, kind):
+            flat.extend(operand.operands())
+        else:
+            flat.append(operand)
+
+    present = set()
+    unique = []
+    for operand in flat:
+        if operand is absorbing:
+            return absorbing
+        if operand is identity or operand in present:
+            continue
+        if negate(operand) in present:
+            # A ∧ ¬A is FALSE and A ∨ ¬A is TRUE
+            return absorbing
+        present.add(operand)
+        unique.append(operand)
+
+    kept = set(subsuming(dual, unique))
+    unique = [operand for operand in unique if operand in kept]
+    if len(unique) == 1:
+        return unique[0]
+    return kind(*unique)
+
+
+def subsuming(dual, operands):
+    """
+    Returns the operands that no other operand subsumes. An operand
+    of a conjunction is subsumed by another whose clause of disjuncts
+    is part of its own: A ∨ B by A, and A ∨ B ∨ C by B ∨ A. Likewise
+    for the terms of a disjunction.
+    """
+    def parts(operand):
+        if isinstance(operand, dual):
+            return frozenset(operand.operands())
+        return frozenset((operand,))
+
+    # Shorter clauses first, so each is checked against all that could
+    # subsume it; of equal clauses the first is kept
+    order = sorted(range(len(operands)),
+                   key=lambda i: len(parts(operands[i])))
+    kept = set()
+    survivors = []
+    for i in order:
+        clause = parts(operands[i])
+        if len(clause) <= SUBSET_LIMIT:
+            subsumed = any(
+                frozenset(subset) in kept
+                for length in range(1, len(clause) + 1)
+                for subset in itertools.combinations(clause, length)
+            )
+        else:
+            subsumed = any(other <= clause for other in kept)
+        if not subsumed:
+            kept.add(clause)
+            survivors.append(operands[i])
+    return survivors
+
+
+def nnf(sentence, negated=False, cache=None):
+    """
+    Returns the negation normal form of a sentence (or of its negation
+    if `negated`): an equivalent sentence of conjunctions and
+    disjunctions of symbols and negated symbols, without implications
+    or biconditionals.
+    """
+    if cache is None:
+        cache = {}
+    key = (sentence, negated)
+    if key in cache:
+        return cache[key]
+
+    if isinstance(sentence, Symbol):
+        result = Not(sentence) if negated else sentence
+    elif isinstance(sentence, Not):
+        result = nnf(sentence.operand, not negated, cache)
+    elif isinstance(sentence, (And, Or)):
+        operands = [nnf(operand, negated, cache)
+                    for operand in sentence.operands()]
+        # De Morgan's laws swap the two under negation
+        result = ((Or if isinstance(sentence, And) else And)(*operands)
+                  if negated else type(sentence)(*operands))
+    elif isinstance(sentence, Implication):
+        result = nnf(Or(Not(sentence.antecedent), sentence.consequent),
+                     negated, cache)
+    elif isinstance(sentence, Biconditional):
+        left, right = sentence.left, sentence.right
+        if negated:
+            rewritten = And(Or(left, right), Or(Not(left), Not(right)))
+        else:
+            rewritten = And(Or(Not(left), right), Or(left, Not(right)))
+        result = nnf(rewritten, False, cache)
+    else:
+        raise TypeError("must be a logical sentence")
+
+    cache[key] = result
+    return result
+
+
+def cnf(sentence):
+    """
+    Returns the simplified conjunctive normal form of a sentence: a
+    conjunction of clauses, each a disjunction of symbols and negated
+    symbols. It can be exponentially larger than the sentence, which
+    sat.py's encoding avoids by adding symbols.
+    """
+    return simplify(And(*[Or(*clause) for clause in clauses(
+        simplify(nnf(sentence)), {}
+    )]))
+
+
+def clauses(sentence, cache):
+    """
+    Returns the clauses of a simplified sentence in negation normal
+    form, as lists of literals, distributing disjunctions over
+    conjunctions.
+    """
+    if sentence in cache:
+        return cache[sentence]
+    if isinstance(sentence, And):
+        result = [clause for conjunct in sentence.conjuncts
+                  for clause in clauses(conjunct, cache)]
+    elif isinstance(sentence, Or):
+        result = [[]]
+        for disjunct in sentence.disjuncts:
+            result = [clause + other for clause in result
+                      for other in clauses(disjunct, cache)]
+    else:
+        result = [[sentence]]
+    cache[sentence] = result
+    return result
@@ -1,6 +1,6 @@
 import pygame
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -8,6 +8,9 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Frames per second while waiting for input or the AI
+FPS = 30
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -41,6 +44,15 @@ mine = pygame.transform.scale(mine, (cell_size, cell_size))
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
 ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
 
+# The AI updates its knowledge and picks moves on one worker thread,
+# in the order they were asked for, so the window keeps responding
+executor = ThreadPoolExecutor(max_workers=1)
+clock = pygame.time.Clock()
+
+# Knowledge updates and AI moves not yet finished
+pending = []
+ai_move = None
+
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 flags = set()
@@ -49,12 +61,51 @@ lost = False
 # Show instructions initially
 instructions = True
 
+
+def choose_ai_move(ai):
+    """
+    Returns the AI's next move, or None with the cells it knows are
+    mines if there are no moves left.
+    """
+    move = ai.make_safe_move()
+    if move is None:
+        move = ai.make_random_move()
+        if move is None:
+            print("No moves left to make.")
+            return None, ai.mines.copy()
+        else:
+            print("No known safe moves, AI making random move.")
+    else:
+        print("AI making safe move.")
+    return move, None
+
+
+def cancel_ai_move():
+    """
+    Stops waiting for the AI's move. A move already being chosen is
+    ignored once it is ready. Knowledge updates are never cancelled, so
+    the AI stays consistent with the revealed cells.
+    """
+    global ai_move
+    if ai_move is not None:
+        ai_move.cancel()
+        ai_move = None
+
+
 while True:
 
-    # Check if game quit
+    # Check if game quit or a cell or button clicked
+    left_click = right_click = None
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai_move()
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:
+                left_click = event.pos
+            elif event.button == 3:
+                right_click = event.pos
 
     screen.fill(BLACK)
 
@@ -88,14 +139,11 @@ while True:
         screen.blit(buttonText, buttonTextRect)
 
         # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
-                instructions = False
-                time.sleep(0.3)
+        if left_click is not None and buttonRect.collidepoint(left_click):
+            instructions = False
 
         pygame.display.flip()
+        clock.tick(FPS)
         continue
 
     # Draw board
@@ -135,7 +183,11 @@ while True:
         (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
         (width / 3) - BOARD_PADDING * 2, 50
     )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
+    if pending:
+        dots = pygame.time.get_ticks() // 400 % 3 + 1
+        buttonText = mediumFont.render("Thinking" + "." * dots, True, BLACK)
+    else:
+        buttonText = mediumFont.render("AI Move", True, BLACK)
     buttonRect = buttonText.get_rect()
     buttonRect.center = aiButton.center
     pygame.draw.rect(screen, WHITE, aiButton)
@@ -146,7 +198,8 @@ while True:
         (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
         (width / 3) - BOARD_PADDING * 2, 50
     )
-    buttonText = mediumFont.render("Reset", True, BLACK)
+    buttonText = mediumFont.render("Cancel" if ai_move is not None else "Reset",
+                                   True, BLACK)
     buttonRect = buttonText.get_rect()
     buttonRect.center = resetButton.center
     pygame.draw.rect(screen, WHITE, resetButton)
@@ -161,62 +214,70 @@ while True:
 
     move = None
 
-    left, _, right = pygame.mouse.get_pressed()
+    # Forget finished work, raising any error it hit, and make the AI's
+    # move once it is chosen
+    for future in pending:
+        if future.done() and not future.cancelled():
+            future.result()
+    pending = [future for future in pending if not future.done()]
+    if ai_move is not None and ai_move.done():
+        move, mines = ai_move.result()
+        ai_move = None
+
+        # Drop a move that is no longer possible, as after a mine was hit
+        if lost or move in revealed:
+            move = None
+        elif mines is not None:
+            flags = mines
 
     # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
+    if right_click is not None and not lost:
         for i in range(HEIGHT):
             for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
+                if cells[i][j].collidepoint(right_click) and (i, j) not in revealed:
                     if (i, j) in flags:
                         flags.remove((i, j))
                     else:
                         flags.add((i, j))
-                    time.sleep(0.2)
-
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
-
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
-                if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
-                else:
-                    print("No known safe moves, AI making random move.")
+
+    elif left_click is not None:
+
+        # If AI button clicked, ask the AI for a move
+        if aiButton.collidepoint(left_click) and not lost:
+            if ai_move is None:
+                ai_move = executor.submit(choose_ai_move, ai)
+                pending.append(ai_move)
+
+        # Cancel the AI, or reset game state
+        elif resetButton.collidepoint(left_click):
+            if ai_move is not None:
+                cancel_ai_move()
             else:
-                print("AI making safe move.")
-            time.sleep(0.2)
-
-        # Reset game state
-        elif resetButton.collidepoint(mouse):
-            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
-            revealed = set()
-            flags = set()
-            lost = False
-            continue
+                game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
+                ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+                revealed = set()
+                flags = set()
+                lost = False
+                pending = []
+                move = None
 
         # User-made move
         elif not lost:
             for i in range(HEIGHT):
                 for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
+                    if (cells[i][j].collidepoint(left_click)
                             and (i, j) not in flags
                             and (i, j) not in revealed):
                         move = (i, j)
 
-    # Make move and update AI knowledge
+    # Make move and update AI knowledge in the background
     if move:
         if game.is_mine(move):
             lost = True
         else:
             nearby = game.nearby_mines(move)
             revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            pending.append(executor.submit(ai.add_knowledge, move, nearby))
 
     pygame.display.flip()
+    clock.tick(FPS)
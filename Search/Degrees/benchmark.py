@@ -0,0 +1,570 @@
+import csv
+import gc
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+import landmarks
+import loader
+import mazegen
+import snapshot
+import util
+from graph import Graph
+from maze import STRATEGIES, Maze
+from nameindex import NameIndex
+
+FIRST_NAMES = ["Kevin", "Tom", "Emma", "Sally", "Jack", "Meryl", "Gary",
+               "Cary", "Dustin", "Valeria", "Bill", "Chris", "Demi", "Jane"]
+LAST_NAMES = ["Bacon", "Cruise", "Watson", "Field", "Nicholson", "Streep",
+              "Sinise", "Elwes", "Hoffman", "Golino", "Paxton", "Moore"]
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        sys.exit("Usage: python benchmark.py "
+                 f"[{'|'.join(COMMANDS)}] [arguments...]")
+    COMMANDS[sys.argv[1]](*sys.argv[2:])
+
+
+def generate(directory, num_people="100000", num_movies="20000",
+             stars_per_movie="8", seed="0"):
+    """
+    Writes a synthetic people/movies/stars dataset to `directory`.
+    """
+    num_people = int(num_people)
+    num_movies = int(num_movies)
+    stars_per_movie = int(stars_per_movie)
+    rng = random.Random(int(seed))
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i % 997}"
+            writer.writerow([i, name, rng.randint(1900, 2005)])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for m in range(num_movies):
+            writer.writerow([m, f"Movie {m}", rng.randint(1920, 2020)])
+
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for m in range(num_movies):
+            for person in rng.sample(range(num_people), stars_per_movie):
+                writer.writerow([person, m])
+
+
+def measure(load):
+    """
+    Returns (seconds, bytes still allocated) for calling `load()`.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, current
+
+
+def memory(directory="small"):
+    """
+    Compares load time and the memory allocated by Python objects, as
+    traced by tracemalloc, of the dict layout against the compact
+    graph. Neither includes the name index, which is measured on its
+    own.
+    """
+    def load_dicts():
+        degrees.load_data(directory, index_names=False)
+        return degrees.names, degrees.people, degrees.movies
+
+    dict_time, dict_bytes = measure(load_dicts)
+    index_time, index_bytes = measure(lambda: NameIndex(
+        person["name"] for person in degrees.people.values()))
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+
+    graph_time, graph_bytes = measure(lambda: Graph.from_csv(directory))
+
+    print(f"{'layout':<12}{'load (s)':>12}{'memory (MB)':>14}")
+    print(f"{'dicts':<12}{dict_time:>12.3f}{dict_bytes / 2 ** 20:>14.2f}")
+    print(f"{'compact':<12}{graph_time:>12.3f}{graph_bytes / 2 ** 20:>14.2f}")
+    print(f"{'name index':<12}{index_time:>12.3f}"
+          f"{index_bytes / 2 ** 20:>14.2f}")
+    print(f"Compact graph uses {graph_bytes / dict_bytes:.1%} "
+          "of the dict layout's memory.")
+
+
+def bidirectional(directory="small", pairs="50", seed="0"):
+    """
+    Compares node expansions and wall time of unidirectional and
+    bidirectional breadth-first search on random pairs of people.
+    """
+    graph = Graph.from_csv(directory)
+    rng = random.Random(int(seed))
+    num_people = len(graph.person_ids)
+    queries = [(rng.randrange(num_people), rng.randrange(num_people))
+               for _ in range(int(pairs))]
+
+    searches = [
+        ("unidirectional", degrees.breadth_first_search),
+        ("bidirectional", degrees.bidirectional_search),
+    ]
+    lengths = {}
+    print(f"{'search':<16}{'expansions':>14}{'time (s)':>12}")
+    for label, search in searches:
+        expansions = 0
+
+        def neighbors(person):
+            nonlocal expansions
+            expansions += 1
+            return graph.neighbors(person)
+
+        start = time.perf_counter()
+        lengths[label] = [
+            None if path is None else len(path)
+            for path in (search(source, target, neighbors)
+                         for source, target in queries)
+        ]
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16}{expansions:>14}{elapsed:>12.3f}")
+
+    if lengths["unidirectional"] != lengths["bidirectional"]:
+        sys.exit("Path lengths differ between searches.")
+
+
+class ListStackFrontier():
+    """
+    The original list-backed frontier: slicing on every removal and
+    a linear scan for membership.
+    """
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def write_open_maze(filename, size):
+    """
+    Writes a walled `size` x `size` maze with no inner walls,
+    starting in one corner and finishing in the opposite one.
+    """
+    rows = ["#" * (size + 2)]
+    for i in range(size):
+        row = [" "] * size
+        if i == 0:
+            row[0] = "A"
+        if i == size - 1:
+            row[-1] = "B"
+        rows.append("#" + "".join(row) + "#")
+    rows.append("#" * (size + 2))
+    with open(filename, "w") as f:
+        f.write("\n".join(rows) + "\n")
+
+
+def frontiers(directory="small", sizes="25,50,100", pairs="20"):
+    """
+    Times breadth-first search with the original list frontiers
+    against the deque frontiers, on growing open mazes and on
+    random pairs in the degrees graph.
+    """
+    implementations = [
+        ("list", ListStackFrontier, ListQueueFrontier),
+        ("deque", util.StackFrontier, util.QueueFrontier),
+    ]
+
+    print(f"{'maze':<12}{'frontier':<10}{'dfs (s)':>12}{'bfs (s)':>12}")
+    handle, filename = tempfile.mkstemp(suffix=".txt")
+    os.close(handle)
+    try:
+        for size in map(int, sizes.split(",")):
+            write_open_maze(filename, size)
+            maze = Maze(filename)
+            for label, stack, queue in implementations:
+                timings = []
+                for frontier in (stack, queue):
+                    start = time.perf_counter()
+                    maze.solve(frontier())
+                    timings.append(time.perf_counter() - start)
+                print(f"{f'{size}x{size}':<12}{label:<10}"
+                      f"{timings[0]:>12.3f}{timings[1]:>12.3f}")
+    finally:
+        os.remove(filename)
+
+    print()
+    degrees.load_data(directory)
+    rng = random.Random(0)
+    people = sorted(degrees.people)
+    queries = [(rng.choice(people), rng.choice(people))
+               for _ in range(int(pairs))]
+    print(f"{'degrees':<12}{'frontier':<10}{'bfs (s)':>12}")
+    for label, _, queue in implementations:
+        start = time.perf_counter()
+        for source, target in queries:
+            node_search(source, target, degrees.neighbors_for_person, queue())
+        elapsed = time.perf_counter() - start
+        print(f"{'':<12}{label:<10}{elapsed:>12.3f}")
+
+
+class Node():
+    def __init__(self, state, parent, movie):
+        self.state = state
+        self.parent = parent
+        self.movie = movie
+
+
+def node_search(source, target, neighbors, frontier):
+    """
+    The original breadth-first search: one Node per reached person,
+    with the path rebuilt recursively from the target's Node.
+    """
+    visited = set()
+    frontier.add(Node(state=source, parent=None, movie=None))
+    while not frontier.empty():
+        node = frontier.remove()
+        if node.state == target:
+            return []
+        for movie, adjacent in neighbors(node.state):
+            if adjacent == target:
+                return node_path(Node(adjacent, node, movie))
+            elif adjacent not in visited:
+                visited.add(adjacent)
+                frontier.add(Node(adjacent, node, movie))
+    return None
+
+
+def node_path(node):
+    if node.parent is None:
+        return []
+    return node_path(node.parent) + [(node.movie, node.state)]
+
+
+def grid_search(sizes="1000,3000,6000", density="0.2", node_limit="2000",
+                seed="0"):
+    """
+    Times loading random mazes into the padded grid and finding the
+    goal with Node-based breadth-first search (up to `node_limit`
+    cells a side), flat-index search and whole-layer bitset search.
+    """
+    rng = random.Random(int(seed))
+    print(f"{'maze':<12}{'search':<8}{'explored':>12}{'steps':>8}"
+          f"{'time (s)':>10}{'peak MB':>10}")
+    handle, filename = tempfile.mkstemp(suffix=".txt")
+    os.close(handle)
+    try:
+        for size in map(int, sizes.split(",")):
+            mazegen.write_maze(
+                filename,
+                mazegen.random_fill(size + 2, size + 2, rng, float(density)),
+                size + 2)
+            label = f"{size}x{size}"
+            start = time.perf_counter()
+            maze = Maze(filename)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<12}{'load':<8}{'':>12}{'':>8}{elapsed:>10.3f}"
+                  f"{loader.peak_memory() / 2 ** 20:>10.1f}")
+
+            searches = [("grid", maze.solve_grid), ("layers", maze.goal_distance)]
+            if size <= int(node_limit):
+                searches.insert(0, ("nodes", lambda: maze.solve(util.QueueFrontier())))
+            for name, search in searches:
+                start = time.perf_counter()
+                try:
+                    steps = search()
+                except Exception as e:
+                    print(f"{label:<12}{name:<8}{str(e):>12}")
+                    continue
+                elapsed = time.perf_counter() - start
+                if steps is None:
+                    steps = len(maze.solution[0])
+                print(f"{label:<12}{name:<8}{maze.num_explored:>12}{steps:>8}"
+                      f"{elapsed:>10.3f}"
+                      f"{loader.peak_memory() / 2 ** 20:>10.1f}")
+            del maze
+    finally:
+        os.remove(filename)
+
+
+def maze_sweep(output="mazes.csv", sizes="51,101,201",
+               algorithms="backtracker,prim,random",
+               strategies=",".join(STRATEGIES), density="0.25", seed="0"):
+    """
+    Generates a maze of every size with every algorithm and solves it
+    with every strategy, recording time, peak traced memory, explored
+    states and path length. Writes the rows to `output` as CSV, or as
+    JSON if it ends in .json, for comparing runs over time.
+    """
+    rng = random.Random(int(seed))
+    fields = ["algorithm", "size", "strategy", "seconds", "peak_bytes",
+              "explored", "length", "cost", "error"]
+    rows = []
+    handle, filename = tempfile.mkstemp(suffix=".txt")
+    os.close(handle)
+    try:
+        for size in map(int, sizes.split(",")):
+            for algorithm in algorithms.split(","):
+                grid = mazegen.generate(algorithm, size, size, rng,
+                                        float(density))
+                mazegen.write_maze(filename, grid, size)
+                maze = Maze(filename)
+                for strategy in strategies.split(","):
+                    row = {"algorithm": algorithm, "size": size,
+                           "strategy": strategy}
+                    try:
+                        # Time without tracing, which slows allocation
+                        row["seconds"] = round(maze.solve_with(strategy), 6)
+                        gc.collect()
+                        tracemalloc.start()
+                        maze.solve_with(strategy)
+                        row["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                    except Exception as e:
+                        row["error"] = str(e)
+                    else:
+                        row["explored"] = maze.num_explored
+                        row["length"] = len(maze.solution[0])
+                        row["cost"] = maze.path_cost()
+                    finally:
+                        tracemalloc.stop()
+                    rows.append(row)
+                    print(" ".join(f"{key}={row[key]}" for key in fields
+                                   if key in row), flush=True)
+    finally:
+        os.remove(filename)
+
+    with open(output, "w", newline="") as f:
+        if output.endswith(".json"):
+            json.dump(rows, f, indent=2)
+            f.write("\n")
+        else:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    print(f"{len(rows)} results written to {output}.")
+
+
+def allocations(directory="small", pairs="20", seed="0"):
+    """
+    Compares the Node-based search with recursive path rebuilding
+    against the parent-map search, reporting live objects and peak
+    traced memory per expanded person.
+    """
+    graph = Graph.from_csv(directory)
+    rng = random.Random(int(seed))
+    num_people = len(graph.person_ids)
+    queries = [(rng.randrange(num_people), rng.randrange(num_people))
+               for _ in range(int(pairs))]
+    searches = [
+        ("nodes", lambda s, t, neighbors:
+            node_search(s, t, neighbors, util.QueueFrontier())),
+        ("parent dicts", degrees.breadth_first_search),
+        ("parent arrays", lambda s, t, neighbors:
+            degrees.breadth_first_search(s, t, neighbors, size=num_people)),
+    ]
+
+    print(f"{'search':<16}{'objects/node':>14}{'bytes/node':>12}"
+          f"{'time (s)':>10}")
+    for label, search in searches:
+        expansions = 0
+        objects = 0
+        peak_bytes = 0
+        elapsed = 0
+        for source, target in queries:
+            gc.collect()
+            baseline = sys.getallocatedblocks()
+            peak_blocks = baseline
+
+            def neighbors(person):
+                nonlocal expansions, peak_blocks
+                expansions += 1
+                peak_blocks = max(peak_blocks, sys.getallocatedblocks())
+                return graph.neighbors(person)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            search(source, target, neighbors)
+            elapsed += time.perf_counter() - start
+            peak_bytes += tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            objects += peak_blocks - baseline
+        expansions = max(expansions, 1)
+        print(f"{label:<16}{objects / expansions:>14.2f}"
+              f"{peak_bytes / expansions:>12.1f}{elapsed:>10.3f}")
+
+
+def startup(directory="small"):
+    """
+    Compares the time to the first answered query when parsing the
+    CSV files against memory-mapping the binary snapshot. The snapshot
+    is written, and timed, in a temporary copy of `directory`.
+    """
+    with tempfile.TemporaryDirectory() as copy:
+        # Copies keep the sizes and modification times the snapshot
+        # is checked against
+        for source in snapshot.SOURCES:
+            shutil.copy2(os.path.join(directory, source), copy)
+
+        print(f"{'source':<10}{'load (s)':>12}{'query (s)':>12}")
+        for label in ("csv", "snapshot"):
+            start = time.perf_counter()
+            if label == "csv":
+                graph = Graph.from_csv(copy)
+            else:
+                graph = snapshot.load_snapshot(copy)
+            loaded = time.perf_counter()
+            degrees.graph = graph
+            degrees.shortest_path(graph.person_ids[0],
+                                  graph.person_ids[len(graph.person_ids) // 2],
+                                  bidirectional=True)
+            answered = time.perf_counter()
+            print(f"{label:<10}{loaded - start:>12.3f}"
+                  f"{answered - loaded:>12.3f}")
+
+            if label == "csv":
+                start = time.perf_counter()
+                snapshot.write_snapshot(graph, copy)
+                print(f"Snapshot written in "
+                      f"{time.perf_counter() - start:.3f}s.")
+        degrees.graph = None
+        del graph
+
+
+def landmark_search(directory="small", pairs="200", count="8", seed="0"):
+    """
+    Compares breadth-first, bidirectional and landmark-pruned search
+    on random pairs, and reports how often the landmark bounds are
+    tight enough to answer without searching.
+    """
+    graph = Graph.from_csv(directory)
+    start = time.perf_counter()
+    index = landmarks.LandmarkIndex.build(graph, int(count))
+    print(f"Built {count} landmark trees in "
+          f"{time.perf_counter() - start:.3f}s.")
+
+    rng = random.Random(int(seed))
+    num_people = len(graph.person_ids)
+    queries = [(rng.randrange(num_people), rng.randrange(num_people))
+               for _ in range(int(pairs))]
+    tight = sum(1 for source, target in queries
+                if len(set(index.bounds(source, target))) == 1)
+    print(f"Bounds tight for {tight} of {len(queries)} pairs.")
+
+    searches = [
+        ("unidirectional",
+         lambda s, t: degrees.breadth_first_search(s, t, graph.neighbors,
+                                                   size=num_people)),
+        ("bidirectional",
+         lambda s, t: degrees.bidirectional_search(s, t, graph.neighbors)),
+        ("landmarks",
+         lambda s, t: index.shortest_path(s, t, degrees.breadth_first_search,
+                                          size=num_people)),
+        ("landmarks+bidi",
+         lambda s, t: index.shortest_path(s, t, degrees.bidirectional_search,
+                                          prune=False)),
+    ]
+    print(f"{'search':<16}{'time (s)':>12}")
+    lengths = []
+    for label, search in searches:
+        start = time.perf_counter()
+        lengths.append([None if path is None else len(path)
+                        for path in (search(s, t) for s, t in queries)])
+        print(f"{label:<16}{time.perf_counter() - start:>12.3f}")
+    if any(result != lengths[0] for result in lengths):
+        sys.exit("Path lengths differ between searches.")
+
+
+def name_lookup(directory="small", queries="1000", seed="0"):
+    """
+    Times building the name index, prefix completion and fuzzy lookup
+    of names with one character deleted. Generated names are made from
+    a few first and last names, so many share most of a query's
+    trigrams and fuzzy lookup takes tens of milliseconds on them.
+    """
+    graph = snapshot.load_snapshot(directory) or Graph.from_csv(directory)
+    start = time.perf_counter()
+    index = NameIndex(graph.person_names)
+    print(f"Indexed {len(index)} distinct names in "
+          f"{time.perf_counter() - start:.3f}s.")
+
+    rng = random.Random(int(seed))
+    names = [rng.choice(index.names) for _ in range(int(queries))]
+    start = time.perf_counter()
+    for name in names:
+        index.complete(name[:3])
+    prefix = (time.perf_counter() - start) / len(names)
+
+    start = time.perf_counter()
+    index.build_trigrams()
+    built = time.perf_counter() - start
+
+    found = 0
+    start = time.perf_counter()
+    for name in names:
+        i = rng.randrange(len(name))
+        found += name in index.fuzzy(name[:i] + name[i + 1:])
+    fuzzy = (time.perf_counter() - start) / len(names)
+
+    print(f"Prefix completion: {prefix * 1000:.3f} ms per query.")
+    print(f"Trigram postings built in {built:.3f}s.")
+    print(f"Fuzzy lookup: {fuzzy * 1000:.3f} ms per query, "
+          f"{found} of {len(names)} typos resolved.")
+
+
+COMMANDS = {
+    "generate": generate,
+    "memory": memory,
+    "bidirectional": bidirectional,
+    "frontiers": frontiers,
+    "startup": startup,
+    "landmarks": landmark_search,
+    "allocations": allocations,
+    "names": name_lookup,
+    "grid": grid_search,
+    "mazes": maze_sweep,
+}
+
+
+if __name__ == "__main__":
+    main()
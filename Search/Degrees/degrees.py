@@ -1,8 +1,15 @@
-import csv
-import os
+import queue
 import sys
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from util import Node, StackFrontier, QueueFrontier
+import landmarks as landmark_index
+import snapshot
+from graph import Graph
+from loader import CHUNK_SIZE, Progress, read_chunks
+from nameindex import NameIndex
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -10,58 +17,178 @@ names = {}
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of the dicts above when loaded
+graph = None
 
-def load_data(directory):
+# Landmark index over the compact graph, used to bound and prune searches
+landmarks = None
+
+# Prefix and fuzzy index over people's names, see get_name_index
+name_index = None
+
+
+def load_data(directory, progress=None, concurrent=False,
+              chunk_size=CHUNK_SIZE, index_names=True):
     """
-    Load data from CSV files into memory.
+    Load data from CSV files into memory, streaming each file in
+    chunks of rows and keeping only the fields used by the search
+    and the printout.
+
+    If `progress` is given, it is updated as rows are loaded. If
+    `concurrent` is set, the three files are read in separate threads.
+    Unless `index_names` is cleared, the name index is built as well.
+    Returns the number of stars rows that refer to an unknown person
+    or movie, which are skipped.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+    global name_index
+    if progress is None:
+        progress = Progress(stream=None)
+
+    def load_people():
+        for chunk in read_chunks(f"{directory}/people.csv",
+                                 ("id", "name", "birth"), chunk_size):
+            for person_id, name, birth in chunk:
+                people[person_id] = {
+                    "name": name,
+                    "birth": birth,
+                    "movies": set()
+                }
+                if name.lower() not in names:
+                    names[name.lower()] = {person_id}
+                else:
+                    names[name.lower()].add(person_id)
+            progress.update("people", len(chunk))
+
+    def load_movies():
+        for chunk in read_chunks(f"{directory}/movies.csv",
+                                 ("id", "title"), chunk_size):
+            for movie_id, title in chunk:
+                movies[movie_id] = {
+                    "title": title,
+                    "stars": set()
+                }
+            progress.update("movies", len(chunk))
+
+    def link_stars(chunk):
+        orphans = 0
+        for person_id, movie_id in chunk:
+            if person_id in people and movie_id in movies:
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
             else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+                orphans += 1
+        progress.update("stars", len(chunk), orphans)
+        return orphans
+
+    stars = ("person_id", "movie_id")
+    if not concurrent:
+        load_people()
+        load_movies()
+        orphans = sum(link_stars(chunk) for chunk in read_chunks(
+            f"{directory}/stars.csv", stars, chunk_size))
+        if index_names:
+            name_index = NameIndex(person["name"]
+                                   for person in people.values())
+        progress.report()
+        return orphans
+
+    # Parse stars while people and movies load, through a bounded queue
+    # so that at most a few chunks are held before they can be linked
+    chunks = queue.Queue(maxsize=4)
+    stopped = threading.Event()
+
+    def read_stars():
+        try:
+            for chunk in read_chunks(f"{directory}/stars.csv", stars,
+                                     chunk_size):
+                if stopped.is_set():
+                    break
+                chunks.put(chunk)
+        finally:
+            # Always end the stream, so a failed read cannot leave the
+            # linking loop waiting; its error is raised by result()
+            chunks.put(None)
+
+    orphans = 0
+    chunk = ()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        people_loaded = pool.submit(load_people)
+        movies_loaded = pool.submit(load_movies)
+        stars_read = pool.submit(read_stars)
+        try:
+            people_loaded.result()
+            movies_loaded.result()
+            while (chunk := chunks.get()) is not None:
+                orphans += link_stars(chunk)
+        finally:
+            # If linking stopped early, let the reader finish
+            stopped.set()
+            while chunk is not None:
+                chunk = chunks.get()
+        stars_read.result()
+    if index_names:
+        name_index = NameIndex(person["name"] for person in people.values())
+    progress.report()
+    return orphans
+
+
+def load_graph(directory):
+    """
+    Load data into the compact graph representation, memory-mapping
+    the binary snapshot of the CSV files when it is up to date and
+    refreshing it otherwise.
+    """
+    global graph, name_index
+    name_index = None
+    graph = snapshot.load_snapshot(directory)
+    if graph is None:
+        graph = Graph.from_csv(directory)
+        try:
+            snapshot.write_snapshot(graph, directory)
+        except OSError:
+            pass
+
+
+def load_landmarks(directory, count=landmark_index.LANDMARKS):
+    """
+    Load the landmark index for the compact graph, building it or
+    bringing it up to date with stars.csv as needed.
+    """
+    global landmarks
+    landmarks = landmark_index.load_index(graph, directory, count)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
+    options = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    args = [arg for arg in sys.argv[1:] if arg not in options]
+    if len(args) > 1 or not options <= {"--compact", "--bidirectional",
+                                        "--landmarks", "--progress",
+                                        "--threads"}:
+        sys.exit("Usage: python degrees.py [directory] "
+                 "[--compact] [--bidirectional] [--landmarks] "
+                 "[--progress] [--threads]")
 
-    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+    directory = args[0] if len(args) == 1 else "small"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    if "--landmarks" in options:
+        load_graph(directory)
+        load_landmarks(directory)
+    elif "--compact" in options:
+        load_graph(directory)
+    else:
+        orphans = load_data(
+            directory,
+            progress=Progress() if "--progress" in options else None,
+            concurrent="--threads" in options
+        )
+        if orphans:
+            print(f"Skipped {orphans} stars rows "
+                  "for unknown people or movies.")
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -71,7 +198,8 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target,
+                         bidirectional="--bidirectional" in options)
 
     if path is None:
         print("Not connected.")
@@ -80,46 +208,187 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is set, searches from both ends at once.
+    If the landmark index is loaded, it answers what it can from its
+    trees and bounds, and prunes a unidirectional search.
+    If no possible path, returns None.
+    """
+    search = bidirectional_search if bidirectional else breadth_first_search
+
+    if graph is None:
+        return search(source, target, neighbors_for_person)
+
+    # Search over interned indices and translate the path back to ids
+    source = person_index(source)
+    target = person_index(target)
+    if landmarks is not None:
+        path = landmarks.shortest_path(
+            source, target, search,
+            size=None if bidirectional else len(graph.person_ids),
+            prune=not bidirectional
+        )
+    elif bidirectional:
+        path = search(source, target, graph.neighbors)
+    else:
+        path = search(source, target, graph.neighbors,
+                      size=len(graph.person_ids))
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation
+    between two people from the landmark index. `upper` is None if
+    unknown, and both are None if the people are not connected.
+    """
+    return landmarks.bounds(person_index(source), person_index(target))
+
+
+def breadth_first_search(source, target, neighbors, size=None):
+    """
+    Returns the shortest list of (movie, person) pairs connecting
+    the source to the target, where `neighbors(person)` yields the
+    (movie, person) pairs adjacent to a person.
+
+    Parents are recorded in two maps from person to previous person
+    and connecting movie. If `size` is given, people are integers
+    below it and the maps are flat arrays instead of dicts.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    if size is None:
+        parent_people = {}
+        parent_movies = {}
+        unvisited = None
+        parent_of = parent_people.get
+    else:
+        parent_people = array("i", [-1]) * size
+        parent_movies = array("i", [-1]) * size
+        unvisited = -1
+        parent_of = parent_people.__getitem__
+    parent_people[source] = source
+
+    nexts = deque([source])
+    while nexts:
+        person = nexts.popleft()
+        for movie, adjacent in neighbors(person):
+            if parent_of(adjacent) == unvisited:
+                parent_people[adjacent] = person
+                parent_movies[adjacent] = movie
+                if adjacent == target:
+                    return backtracking(parent_people, parent_movies,
+                                        source, target)
+                nexts.append(adjacent)
+
+    return None
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Returns the shortest list of (movie, person) pairs connecting
+    the source to the target, searching outward from both ends
+    and always expanding the smaller of the two frontiers.
+
     If no possible path, returns None.
     """
-    source_id = source
-    target_id = target
-    visited_ids = set()
-
-    nexts = QueueFrontier()
-    nexts.add(Node(state=source_id, parent=None, movie=None))
-
-    while not nexts.empty():
-        current_node = nexts.remove()
-        adjacents = neighbors_for_person(current_node.state)
-
-        if current_node.state == target_id:
-            return []
-        for item in adjacents:
-            adjacent_id = item[1]
-            if adjacent_id == target_id:
-                current_node = Node(state=adjacent_id, parent=current_node, movie=item[0])
-                return backtracking(current_node)
-            elif adjacent_id not in visited_ids:
-                visited_ids.add(adjacent_id)
-                nexts.add(Node(adjacent_id, current_node, movie=item[0]))
-
-def backtracking(current_node):
-    if current_node.parent == None:
+    if source == target:
         return []
-    return backtracking(current_node.parent) + [(current_node.movie, current_node.state)]
 
+    # Each side maps a reached person to (previous person, movie, depth),
+    # pointing back towards the end that side started from
+    forward = {source: (None, None, 0)}
+    backward = {target: (None, None, 0)}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        expand_forward = len(forward_layer) <= len(backward_layer)
+        if expand_forward:
+            layer, reached, other = forward_layer, forward, backward
+        else:
+            layer, reached, other = backward_layer, backward, forward
+
+        # Expand the whole layer, keeping the shortest meeting point:
+        # people on the other side may sit at different depths
+        best = None
+        next_layer = []
+        for person in layer:
+            depth = reached[person][2] + 1
+            for movie, adjacent in neighbors(person):
+                if adjacent in other:
+                    if best is None or other[adjacent][2] < best[0]:
+                        best = (other[adjacent][2], person, movie, adjacent)
+                elif adjacent not in reached:
+                    reached[adjacent] = (person, movie, depth)
+                    next_layer.append(adjacent)
+
+        if best is not None:
+            _, person, movie, adjacent = best
+            if expand_forward:
+                return join_paths(forward, backward, person, movie, adjacent)
+            return join_paths(forward, backward, adjacent, movie, person)
+
+        if expand_forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    return None
+
+
+def join_paths(forward, backward, meet_source, movie, meet_target):
+    """
+    Joins the forward path ending at `meet_source` and the backward
+    path starting at `meet_target`, linked by `movie`, into a list of
+    (movie, person) pairs.
+    """
+    path = []
+    person = meet_source
+    while forward[person][0] is not None:
+        previous, previous_movie, _ = forward[person]
+        path.append((previous_movie, person))
+        person = previous
+    path.reverse()
+
+    path.append((movie, meet_target))
+    person = meet_target
+    while backward[person][0] is not None:
+        following, following_movie, _ = backward[person]
+        path.append((following_movie, following))
+        person = following
+
+    return path
+
+
+def backtracking(parent_people, parent_movies, source, target):
+    """
+    Rebuilds the list of (movie, person) pairs from the source to the
+    target by following parent links back from the target.
+    """
+    path = []
+    person = target
+    while person != source:
+        path.append((parent_movies[person], person))
+        person = parent_people[person]
+    path.reverse()
+    return path
 
 
 def person_id_for_name(name):
@@ -127,15 +396,17 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = people_named(name)
     if len(person_ids) == 0:
+        suggestions = suggest_names(name)
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -148,11 +419,79 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def people_named(name, birth=None):
+    """
+    Returns the IMDB ids of everyone with a name, ignoring case,
+    optionally only those born in `birth`. Never prompts, so batch
+    callers can disambiguate on their own.
+    """
+    if graph is None:
+        person_ids = sorted(names.get(name.lower(), set()))
+    else:
+        person_ids = [graph.person_ids[i] for i in graph.find_people(name)]
+    if birth is not None:
+        person_ids = [person_id for person_id in person_ids
+                      if person_birth(person_id) == str(birth)]
+    return person_ids
+
+
+def get_name_index():
+    """
+    Returns the name index, building it on first use for the
+    compact graph.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(graph.person_names if graph is not None
+                               else (person["name"] for person in people.values()))
+    return name_index
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to `limit` names starting with `prefix`, ignoring case.
+    """
+    return get_name_index().complete(prefix, limit)
+
+
+def suggest_names(name, limit=5):
+    """
+    Returns up to `limit` known names closest to a misspelled one.
+    """
+    return get_name_index().fuzzy(name, limit)
+
+
+def person_index(person_id):
+    """
+    Returns the compact graph's index of a person, raising KeyError
+    for an unknown IMDB id as the dicts do.
+    """
+    index = graph.find_person(person_id)
+    if index is None:
+        raise KeyError(person_id)
+    return index
+
+
+def movie_index(movie_id):
+    """
+    Returns the compact graph's index of a movie, raising KeyError
+    for an unknown IMDB id as the dicts do.
+    """
+    index = graph.find_movie(movie_id)
+    if index is None:
+        raise KeyError(movie_id)
+    return index
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in graph.neighbors(person_index(person_id))}
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -161,44 +500,31 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
-class Node():
-    def __init__(self, state, parent, movie):
-        self.state = state
-        self.parent = parent
-        self.movie = movie
-
-
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
-
-    def add(self, node):
-        self.frontier.append(node)
-
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
-
-    def empty(self):
-        return len(self.frontier) == 0
+def person_name(person_id):
+    """
+    Returns the name of a person.
+    """
+    if graph is not None:
+        return graph.person_names[person_index(person_id)]
+    return people[person_id]["name"]
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
 
+def person_birth(person_id):
+    """
+    Returns the birth year of a person.
+    """
+    if graph is not None:
+        return graph.person_births[person_index(person_id)]
+    return people[person_id]["birth"]
 
-class QueueFrontier(StackFrontier):
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+def movie_title(movie_id):
+    """
+    Returns the title of a movie.
+    """
+    if graph is not None:
+        return graph.movie_titles[movie_index(movie_id)]
+    return movies[movie_id]["title"]
 
 
 if __name__ == "__main__":
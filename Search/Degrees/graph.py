@@ -0,0 +1,203 @@
+import csv
+from array import array
+
+
+class Graph():
+    """
+    Compact representation of the people/movies star graph.
+
+    IMDB ids are interned into dense integers: person `i` is
+    `person_ids[i]`, movie `m` is `movie_ids[m]`. The bipartite
+    stars relation is stored twice in CSR form, once per side:
+    the movies of person `i` are
+    `person_movies[person_offsets[i]:person_offsets[i + 1]]`
+    and the stars of movie `m` are
+    `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_stars):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Reverse lookups from IMDB ids and lowercase names to indices
+        self.person_index = {
+            person_id: i for i, person_id in enumerate(person_ids)
+        }
+        self.movie_index = {
+            movie_id: m for m, movie_id in enumerate(movie_ids)
+        }
+        self.name_index = {}
+        for i, name in enumerate(person_names):
+            self.name_index.setdefault(name.lower(), []).append(i)
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds a graph from the people, movies and stars CSV files
+        in `directory`. Stars rows that refer to unknown people or
+        movies are skipped, duplicate rows are collapsed.
+        """
+        person_ids = []
+        person_names = []
+        person_births = []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            i, n, b = (header.index(field) for field in ("id", "name", "birth"))
+            for row in reader:
+                person_ids.append(row[i])
+                person_names.append(row[n])
+                person_births.append(row[b])
+
+        movie_ids = []
+        movie_titles = []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            i, t = (header.index(field) for field in ("id", "title"))
+            for row in reader:
+                movie_ids.append(row[i])
+                movie_titles.append(row[t])
+
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: m for m, movie_id in enumerate(movie_ids)}
+
+        # Collect (person, movie) edges as two parallel int arrays
+        edge_people = array("i")
+        edge_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            p, m = (header.index(field) for field in ("person_id", "movie_id"))
+            for row in reader:
+                person = person_index.get(row[p])
+                movie = movie_index.get(row[m])
+                if person is None or movie is None:
+                    continue
+                edge_people.append(person)
+                edge_movies.append(movie)
+
+        person_offsets, person_movies = build_csr(
+            len(person_ids), edge_people, edge_movies
+        )
+        movie_offsets, movie_stars = transpose_csr(
+            len(movie_ids), person_offsets, person_movies
+        )
+
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles,
+                   person_offsets, person_movies,
+                   movie_offsets, movie_stars)
+
+    def find_person(self, person_id):
+        """
+        Returns the index of the person with an IMDB id, or None.
+        """
+        return self.person_index.get(person_id)
+
+    def find_movie(self, movie_id):
+        """
+        Returns the index of the movie with an IMDB id, or None.
+        """
+        return self.movie_index.get(movie_id)
+
+    def find_people(self, name):
+        """
+        Returns the indices of all people with a name, ignoring case.
+        """
+        return self.name_index.get(name.lower(), [])
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person starred in.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices who starred in a movie.
+        """
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def degree(self, person):
+        """
+        Returns the number of movies a person starred in.
+        """
+        return self.person_offsets[person + 1] - self.person_offsets[person]
+
+
+def build_csr(num_rows, rows, columns):
+    """
+    Builds CSR (offsets, indices) arrays from parallel arrays of
+    row and column indices. Columns are sorted and deduplicated
+    within each row.
+    """
+    # Count entries per row, then turn counts into start offsets
+    offsets = array("q", bytes(8 * (num_rows + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(num_rows):
+        offsets[i + 1] += offsets[i]
+
+    # Scatter columns into their rows
+    indices = array("i", bytes(4 * len(columns)))
+    cursor = offsets[:-1]
+    for row, column in zip(rows, columns):
+        indices[cursor[row]] = column
+        cursor[row] += 1
+
+    # Sort and deduplicate every row, compacting in place
+    write = 0
+    start = 0
+    for i in range(num_rows):
+        end = offsets[i + 1]
+        offsets[i] = write
+        previous = -1
+        for column in sorted(indices[start:end]):
+            if column != previous:
+                indices[write] = column
+                write += 1
+                previous = column
+        start = end
+    offsets[num_rows] = write
+    del indices[write:]
+
+    return offsets, indices
+
+
+def transpose_csr(num_columns, offsets, indices):
+    """
+    Returns the CSR arrays of the transpose of a CSR matrix.
+    """
+    rows = array("i")
+    for i in range(len(offsets) - 1):
+        rows.extend([i] * (offsets[i + 1] - offsets[i]))
+    return build_csr(num_columns, indices, rows)
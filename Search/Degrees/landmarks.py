@@ -0,0 +1,357 @@
+import csv
+import io
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import deque
+
+from graph import Graph
+
+MAGIC = b"DEGLMRK\0"
+VERSION = 1
+FILENAME = "degrees.landmarks"
+LANDMARKS = 8
+
+# Magic, version, (size, mtime_ns) of people.csv and movies.csv,
+# the stars.csv length already indexed and a CRC of its last bytes,
+# the number of landmarks and the number of people
+HEADER = struct.Struct("<8sI4xqqqqqIIq")
+TAIL = 4096
+UNREACHABLE = -1
+
+
+class LandmarkIndex():
+    """
+    Breadth-first search trees rooted at a few well-connected people.
+
+    For landmark `k`, `distances[k][i]` is the number of degrees
+    between the landmark and person `i` (UNREACHABLE if none), and
+    `parent_people[k][i]`/`parent_movies[k][i]` is the next step from
+    person `i` towards the landmark.
+    """
+
+    def __init__(self, graph, landmarks, distances, parent_people,
+                 parent_movies):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+        self.parent_people = parent_people
+        self.parent_movies = parent_movies
+
+    @classmethod
+    def build(cls, graph, count=LANDMARKS):
+        """
+        Builds an index over the `count` people who starred in the
+        most movies.
+        """
+        people = sorted(range(len(graph.person_ids)),
+                        key=graph.degree, reverse=True)[:count]
+        trees = [bfs_tree(graph, landmark) for landmark in people]
+        return cls(graph, people, *(list(parts) for parts in zip(*trees)))
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees between two
+        people. `upper` is None if no landmark reaches both, and both
+        are None if the landmarks prove the people are not connected.
+        """
+        lower = 0
+        upper = None
+        for distances in self.distances:
+            to_source = distances[source]
+            to_target = distances[target]
+            if (to_source == UNREACHABLE) != (to_target == UNREACHABLE):
+                return None, None
+            if to_source == UNREACHABLE:
+                continue
+            lower = max(lower, abs(to_source - to_target))
+            if upper is None or to_source + to_target < upper:
+                upper = to_source + to_target
+        return lower, upper
+
+    def lower_bound(self, person, target):
+        """
+        Returns a lower bound on the degrees between two people.
+        """
+        lower = 0
+        for distances in self.distances:
+            if distances[person] != UNREACHABLE \
+                    and distances[target] != UNREACHABLE:
+                lower = max(lower, abs(distances[person] - distances[target]))
+        return lower
+
+    def tree_path(self, k, person):
+        """
+        Returns the (movie, person) steps from landmark `k` to a
+        person along the landmark's tree, or None if unreachable.
+        """
+        if self.distances[k][person] == UNREACHABLE:
+            return None
+        path = []
+        while person != self.landmarks[k]:
+            path.append((self.parent_movies[k][person], person))
+            person = self.parent_people[k][person]
+        path.reverse()
+        return path
+
+    def shortest_path(self, source, target, search, size=None, prune=True):
+        """
+        Returns the shortest list of (movie, person) pairs connecting
+        two people, or None if they are not connected.
+
+        Queries from or to a landmark are answered from its tree, as
+        are queries whose bounds meet. Otherwise `search(source, target,
+        neighbors)` runs on the graph, given `size` if set. If `prune`
+        is set, it does not expand the people whose landmark lower
+        bounds rule them out of a path no longer than the best landmark
+        route; checking costs more than it saves a bidirectional search.
+        """
+        def run(neighbors):
+            if size is None:
+                return search(source, target, neighbors)
+            return search(source, target, neighbors, size=size)
+
+        if source == target:
+            return []
+        for k, landmark in enumerate(self.landmarks):
+            if landmark == source:
+                return self.tree_path(k, target)
+            if landmark == target:
+                path = self.tree_path(k, source)
+                return None if path is None else reverse_path(path, target)
+
+        lower, upper = self.bounds(source, target)
+        if lower is None:
+            return None
+        if upper is None or not prune:
+            return run(self.graph.neighbors)
+
+        # A landmark route as short as the lower bound is a shortest path
+        if lower == upper:
+            for k, landmark in enumerate(self.landmarks):
+                distances = self.distances[k]
+                if distances[source] != UNREACHABLE \
+                        and distances[source] + distances[target] == upper:
+                    return (reverse_path(self.tree_path(k, source), landmark)
+                            + self.tree_path(k, target))
+
+        # Landmark distances of both ends, for landmarks reaching them
+        ends = [(distances, distances[source], distances[target])
+                for distances in self.distances
+                if distances[source] != UNREACHABLE]
+
+        def neighbors(person):
+            # People are still reached, but only expanded if some path
+            # through them could be as short as the landmark route
+            to_source = to_target = 0
+            for distances, source_distance, target_distance in ends:
+                distance = distances[person]
+                to_source = max(to_source, abs(distance - source_distance))
+                to_target = max(to_target, abs(distance - target_distance))
+            if to_source + to_target > upper:
+                return ()
+            return self.graph.neighbors(person)
+
+        return run(neighbors)
+
+    def update(self, edges):
+        """
+        Updates every tree after the given (person, movie) stars rows
+        were added to the graph. Distances can only shrink, so changes
+        are propagated outward from the new edges.
+        """
+        graph = self.graph
+        for k in range(len(self.landmarks)):
+            distances = self.distances[k]
+            parent_people = self.parent_people[k]
+            parent_movies = self.parent_movies[k]
+            queue = deque()
+
+            def relax(person, movie, adjacent):
+                if distances[person] == UNREACHABLE:
+                    return
+                if distances[adjacent] == UNREACHABLE \
+                        or distances[person] + 1 < distances[adjacent]:
+                    distances[adjacent] = distances[person] + 1
+                    parent_people[adjacent] = person
+                    parent_movies[adjacent] = movie
+                    queue.append(adjacent)
+
+            for person, movie in edges:
+                for star in graph.stars_of(movie):
+                    relax(person, movie, star)
+                    relax(star, movie, person)
+            while queue:
+                person = queue.popleft()
+                for movie, adjacent in graph.neighbors(person):
+                    relax(person, movie, adjacent)
+
+
+def bfs_tree(graph, root):
+    """
+    Returns (distances, parent people, parent movies) arrays of a
+    breadth-first search tree rooted at `root`.
+    """
+    num_people = len(graph.person_ids)
+    distances = array("i", [UNREACHABLE]) * num_people
+    parent_people = array("i", [UNREACHABLE]) * num_people
+    parent_movies = array("i", [UNREACHABLE]) * num_people
+    seen_movies = bytearray(len(graph.movie_ids))
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    distances[root] = 0
+    queue = deque([root])
+    while queue:
+        person = queue.popleft()
+        depth = distances[person] + 1
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+
+            # Everyone in a movie is reached the first time it is seen
+            if seen_movies[movie]:
+                continue
+            seen_movies[movie] = 1
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                star = movie_stars[j]
+                if distances[star] == UNREACHABLE:
+                    distances[star] = depth
+                    parent_people[star] = person
+                    parent_movies[star] = movie
+                    queue.append(star)
+    return distances, parent_people, parent_movies
+
+
+def reverse_path(path, start):
+    """
+    Reverses a path of (movie, person) steps leading away from
+    `start`, so that it leads back to `start` instead.
+    """
+    people = [start] + [person for _, person in path[:-1]]
+    return [(movie, person)
+            for (movie, _), person in zip(reversed(path), reversed(people))]
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python landmarks.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else LANDMARKS
+    index = load_index(Graph.from_csv(directory), directory, count)
+    print(f"Landmark index with {len(index.landmarks)} landmarks "
+          f"written to {index_path(directory)}.")
+
+
+def index_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def stars_tail_crc(directory, length):
+    """
+    Returns a CRC of the last bytes of the first `length` bytes of
+    stars.csv, used to check the file was only appended to.
+    """
+    with open(os.path.join(directory, "stars.csv"), "rb") as f:
+        f.seek(max(0, length - TAIL))
+        return zlib.crc32(f.read(min(length, TAIL)))
+
+
+def read_new_stars(graph, directory, offset):
+    """
+    Returns (person, movie) index pairs for the stars.csv rows
+    after byte `offset`, skipping rows for unknown people or movies.
+    """
+    with open(os.path.join(directory, "stars.csv"), "rb") as f:
+        header = next(csv.reader(io.StringIO(f.readline().decode("utf-8"))))
+        p, m = (header.index(field) for field in ("person_id", "movie_id"))
+        f.seek(offset)
+        text = f.read().decode("utf-8")
+    edges = []
+    for row in csv.reader(io.StringIO(text)):
+        if len(row) <= max(p, m):
+            continue
+        person = graph.find_person(row[p])
+        movie = graph.find_movie(row[m])
+        if person is not None and movie is not None:
+            edges.append((person, movie))
+    return edges
+
+
+def source_fingerprint(directory):
+    """
+    Returns the (size, mtime_ns) pairs of people.csv and movies.csv
+    and the current size of stars.csv.
+    """
+    values = []
+    for source in ("people.csv", "movies.csv"):
+        stat = os.stat(os.path.join(directory, source))
+        values.extend([stat.st_size, stat.st_mtime_ns])
+    return values, os.path.getsize(os.path.join(directory, "stars.csv"))
+
+
+def save_index(index, directory):
+    """
+    Writes the index next to the dataset in `directory`.
+    """
+    sources, stars_size = source_fingerprint(directory)
+    path = index_path(directory)
+    partial = f"{path}.partial"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, *sources, stars_size,
+                            stars_tail_crc(directory, stars_size),
+                            len(index.landmarks), len(index.graph.person_ids)))
+        f.write(array("i", index.landmarks).tobytes())
+        for k in range(len(index.landmarks)):
+            f.write(index.distances[k].tobytes())
+            f.write(index.parent_people[k].tobytes())
+            f.write(index.parent_movies[k].tobytes())
+    os.replace(partial, path)
+
+
+def load_index(graph, directory, count=LANDMARKS):
+    """
+    Returns the landmark index for `graph`, reading it from disk if
+    it is still valid and building and saving it otherwise. If only
+    rows were appended to stars.csv, the saved trees are updated
+    with the new rows instead of being rebuilt.
+    """
+    index = None
+    sources, stars_size = source_fingerprint(directory)
+    try:
+        with open(index_path(directory), "rb") as f:
+            header = HEADER.unpack(f.read(HEADER.size))
+            magic, version, *saved_sources, indexed, crc, k, num_people = header
+            if (magic == MAGIC and version == VERSION and k == count
+                    and saved_sources == sources
+                    and num_people == len(graph.person_ids)
+                    and indexed <= stars_size
+                    and stars_tail_crc(directory, indexed) == crc):
+                landmarks = array("i")
+                landmarks.fromfile(f, k)
+                trees = []
+                for _ in range(3 * k):
+                    tree = array("i")
+                    tree.fromfile(f, num_people)
+                    trees.append(tree)
+                index = LandmarkIndex(graph, list(landmarks),
+                                      trees[0::3], trees[1::3], trees[2::3])
+    except (OSError, EOFError, struct.error):
+        index = None
+
+    if index is None:
+        index = LandmarkIndex.build(graph, count)
+    elif indexed == stars_size:
+        return index
+    else:
+        index.update(read_new_stars(graph, directory, indexed))
+
+    try:
+        save_index(index, directory)
+    except OSError:
+        pass
+    return index
@@ -0,0 +1,85 @@
+import csv
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+CHUNK_SIZE = 10000
+
+
+class Progress():
+    """
+    Thread-safe row counters for a load, reporting throughput and
+    memory to a stream at most every `interval` seconds.
+    """
+
+    def __init__(self, stream=sys.stderr, interval=1.0):
+        self.stream = stream
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.last_report = self.start
+        self.rows = {}
+        self.orphans = {}
+
+    def update(self, name, rows, orphans=0):
+        with self.lock:
+            self.rows[name] = self.rows.get(name, 0) + rows
+            self.orphans[name] = self.orphans.get(name, 0) + orphans
+            now = time.perf_counter()
+            if self.stream is not None and now - self.last_report >= self.interval:
+                self.last_report = now
+                self.report(now)
+
+    def report(self, now=None):
+        """
+        Writes rows loaded, rows per second and peak memory.
+        """
+        if self.stream is None:
+            return
+        elapsed = (now or time.perf_counter()) - self.start
+        total = sum(self.rows.values())
+        counts = ", ".join(f"{name} {rows}" for name, rows in self.rows.items())
+        line = f"{counts} rows, {total / max(elapsed, 1e-9):,.0f} rows/s"
+        orphans = sum(self.orphans.values())
+        if orphans:
+            line += f", {orphans} orphaned"
+        memory = peak_memory()
+        if memory is not None:
+            line += f", {memory / 2 ** 20:,.1f} MB peak"
+        print(line, file=self.stream, flush=True)
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory of this process in bytes,
+    or None where it is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def read_chunks(filename, fields, chunk_size=CHUNK_SIZE):
+    """
+    Yields lists of at most `chunk_size` tuples holding only the
+    named `fields` of each row of a CSV file.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = [header.index(field) for field in fields]
+        chunk = []
+        for row in reader:
+            chunk.append(tuple(row[column] for column in columns))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -1,44 +1,37 @@
+import re
 import sys
-from typing import override
+import time
 
+from util import Node, StackFrontier, QueueFrontier, PriorityFrontier
 
-class Node:
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+# Direction of each action as a (row, col) step
+DIRECTIONS = {
+    "up": (-1, 0),
+    "down": (1, 0),
+    "right": (0, 1),
+    "left": (0, -1),
+}
+STRATEGIES = ["dfs", "bfs", "grid", "greedy", "astar", "dijkstra", "jps"]
 
+WALL = 0
+OPEN = 1
 
-class StackFrontier:
-    def __init__(self):
-        self.frontier = []
+# Maps each character of a maze file to WALL or OPEN
+CELLS = bytes(OPEN if chr(c) in " AB123456789" else WALL for c in range(256))
+WEIGHTS = re.compile("[2-9]")
 
-    def add(self, node):
-        self.frontier.append(node)
-
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
-
-    def empty(self):
-        return len(self.frontier) == 0
-
-    def remove(self):
-        if self.empty():
-            raise Exception("The frontier is empty")
-        else:
-            node = self.frontier.pop()
-            return node
-
-
-class QueueFrontier(StackFrontier):
-    @override
-    def remove(self):
-        node = self.frontier[0]
-        self.frontier = self.frontier[1:]
-        return node
+# Maps WALL and OPEN bytes to binary digits
+BITS = bytes.maketrans(bytes([WALL, OPEN]), b"01")
 
 
 class Maze:
+    """
+    A maze stored as one flat bytearray with a border of walls, holding
+    OPEN for open cells and WALL for walls. Cell (row, col) is at
+    index (row + 1) * stride + col + 1, so neighbours are fixed offsets
+    away and stepping off the maze always lands on a wall.
+    """
+
     def __init__(self, filename):
         with open(filename) as f:
             contents = f.read()
@@ -51,69 +44,108 @@ class Maze:
         contents = contents.splitlines()
         self.height = len(contents)
         self.width = max(len(line) for line in contents)
-
-        self.walls = []
-
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
-            self.solution = None
+        self.stride = self.width + 2
+
+        # Cost of entering each cell marked with a digit; other open
+        # cells cost 1
+        self.costs = {}
+
+        border = bytes(self.stride)
+        rows = [border]
+        for i, line in enumerate(contents):
+            if "A" in line:
+                self.start = (i, line.index("A"))
+            if "B" in line:
+                self.goal = (i, line.index("B"))
+            for match in WEIGHTS.finditer(line):
+                self.costs[(i, match.start())] = int(match.group())
+
+            # Cells past the end of a shorter line are open
+            rows.append(bytes([WALL]))
+            rows.append(line.encode("latin-1", "replace").translate(CELLS))
+            rows.append(bytes([OPEN]) * (self.width - len(line)))
+            rows.append(bytes([WALL]))
+        rows.append(border)
+        self.grid = bytearray(b"".join(rows))
+
+        # Actions with their offset in the grid and (row, col) step
+        self.moves = [
+            (action, drow * self.stride + dcol, (drow, dcol))
+            for action, (drow, dcol) in DIRECTIONS.items()
+        ]
+        self.solution = None
 
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
+        solution = set(self.solution[1]) if self.solution is not None else None
         print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
+        for i in range(self.height):
+            for j in range(self.width):
+                if not self.walkable(i, j):
                     print("#", end="")
                 elif (i, j) == self.start:
                     print("A", end="")
                 elif (i, j) == self.goal:
                     print("B", end="")
+                elif solution is not None and (i, j) in solution:
+                    print("*", end="")
+                elif (i, j) in self.costs:
+                    print(self.costs[(i, j)], end="")
                 else:
                     print(" ", end="")
             print()
         print()
 
+    def index(self, state):
+        return (state[0] + 1) * self.stride + state[1] + 1
+
+    def state(self, index):
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
     def neighbors(self, state):
         row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("right", (row, col + 1)),
-            ("left", (row, col - 1))
+        i = (row + 1) * self.stride + col + 1
+        grid = self.grid
+        return [
+            (action, (row + drow, col + dcol))
+            for action, offset, (drow, dcol) in self.moves
+            if grid[i + offset]
         ]
 
-        result = []
-        for action, (r, c) in candidates:
-            try:
-                if not self.walls[r][c]:
-                    result.append((action, (r, c)))
-            except IndexError:
-                continue
-
-        return result
-
-    def solve(self):
+    def walkable(self, row, col):
+        # Valid from one cell outside the maze, where the border is
+        return self.grid[(row + 1) * self.stride + col + 1] == OPEN
+
+    def cost(self, state):
+        """
+        Returns the cost of stepping into `state`.
+        """
+        return self.costs.get(state, 1)
+
+    def heuristic(self, state):
+        """
+        Returns the Manhattan distance from `state` to the goal. Every
+        step costs at least 1, so it never overestimates the cost.
+        """
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+    def astar_priority(self, node):
+        # Among equal estimates, prefer nodes closer to the goal, or
+        # open mazes are explored breadth-first along every tied path
+        heuristic = self.heuristic(node.state)
+        return (node.cost + heuristic, heuristic)
+
+    def solve(self, frontier=None):
+        """
+        Finds a path from start to goal, exploring states in the order
+        given by `frontier` (depth-first by default).
+        """
         self.num_explored = 0
         self.explored = set()
 
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
+        if frontier is None:
+            frontier = StackFrontier()
         frontier.add(start)
 
         while True:
@@ -123,29 +155,306 @@ class Maze:
             node = frontier.remove()
             self.num_explored += 1
 
-            if node == self.goal:
-                actions = []
-                cells = []
-
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-
-                self.solution = (actions, cells)
+            if node.state == self.goal:
+                self.solution = self.backtrack(node)
                 return
 
-            self.explored.add(node)
+            self.explored.add(node.state)
 
             for action, state in self.neighbors(node.state):
                 if not frontier.contains_state(state) and state not in self.explored:
                     child = Node(state=state, parent=node, action=action)
                     frontier.add(child)
 
+    def solve_grid(self):
+        """
+        Finds a shortest path from start to goal with breadth-first
+        search over flat grid indices, one layer at a time. Instead of
+        a Node per state, it keeps one byte per cell recording the move
+        that first reached it.
+        """
+        self.num_explored = 0
+        self.explored = None
+
+        unvisited = bytearray(self.grid)
+        came_from = bytearray(len(unvisited))
+        steps = [(k + 1, offset) for k, (_, offset, _) in enumerate(self.moves)]
+        start = self.index(self.start)
+        goal = self.index(self.goal)
+        unvisited[start] = WALL
+
+        layer = [start]
+        while layer:
+            next_layer = []
+            for i in layer:
+                self.num_explored += 1
+                if i == goal:
+                    self.solution = self.grid_path(came_from, goal)
+                    return
+                for move, offset in steps:
+                    j = i + offset
+                    if unvisited[j]:
+                        unvisited[j] = WALL
+                        came_from[j] = move
+                        next_layer.append(j)
+            layer = next_layer
+        raise Exception("no solution")
+
+    def grid_path(self, came_from, goal):
+        """
+        Returns the (actions, cells) of the path to `goal` given the
+        move into every reached cell, as recorded by solve_grid.
+        """
+        actions = []
+        cells = []
+        i = goal
+        while came_from[i]:
+            action, offset, _ = self.moves[came_from[i] - 1]
+            actions.append(action)
+            cells.append(self.state(i))
+            i -= offset
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+    def open_bits(self):
+        """
+        Returns the open cells as an integer with bit `i` set when
+        grid index `i` is open.
+        """
+        return int(self.grid.translate(BITS)[::-1], 2)
+
+    def bfs_layers(self):
+        """
+        Yields the cells first reached at each depth of a breadth-first
+        search from the start, as integers used as bitsets over grid
+        indices. Each layer follows from the last in one set of
+        whole-grid shifts and masks; the border keeps shifts from
+        wrapping between rows.
+        """
+        stride = self.stride
+        cells = self.open_bits()
+        previous = 0
+        layer = 1 << self.index(self.start)
+        while layer:
+            yield layer
+
+            # Neighbours of a layer lie in the layers before and after
+            # it, so only those two need masking out, and every bitset
+            # stays no longer than the layers themselves
+            reached = (layer << 1 | layer >> 1
+                       | layer << stride | layer >> stride) & cells
+            previous, layer = layer, reached & ~(layer | previous)
+
+    def goal_distance(self):
+        """
+        Returns the number of steps on a shortest path from start to
+        goal, found by advancing whole breadth-first layers at once.
+        Records the cells nearer to the start than the goal as explored.
+        """
+        self.num_explored = 0
+        goal = 1 << self.index(self.goal)
+        for depth, layer in enumerate(self.bfs_layers()):
+            if layer & goal:
+                return depth
+            self.num_explored += layer.bit_count()
+        raise Exception("no solution")
+
+    def solve_best_first(self, priority):
+        """
+        Finds a path from start to goal, always expanding the frontier
+        node with the lowest `priority(node)`. A state is added again
+        when a cheaper path to it is found, and stale entries are
+        skipped when removed, so uniform-cost and A* search return
+        cheapest paths.
+        """
+        self.num_explored = 0
+        self.explored = set()
+
+        frontier = PriorityFrontier(priority)
+        frontier.add(Node(state=self.start, parent=None, action=None))
+        best = {self.start: 0}
 
+        while True:
+            if frontier.empty():
+                raise Exception("no solution")
 
+            node = frontier.remove()
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
 
+            if node.state == self.goal:
+                self.solution = self.backtrack(node)
+                return
+
+            self.explored.add(node.state)
+
+            for action, state in self.neighbors(node.state):
+                cost = node.cost + self.cost(state)
+                if state not in self.explored and cost < best.get(state, cost + 1):
+                    best[state] = cost
+                    frontier.add(Node(state, node, action, cost))
+
+    def solve_jump_point(self):
+        """
+        Finds a shortest path from start to goal with jump point search,
+        an A* search that only expands the cells where a path may have
+        to turn, jumping straight over runs of open cells between them.
+        Only valid when every step costs the same.
+        """
+        if self.costs:
+            raise Exception("jump point search needs uniform cell costs")
+        self.num_explored = 0
+        self.explored = set()
 
+        frontier = PriorityFrontier(self.astar_priority)
+        frontier.add(Node(state=self.start, parent=None, action=None))
+        best = {self.start: 0}
 
+        while True:
+            if frontier.empty():
+                raise Exception("no solution")
+
+            node = frontier.remove()
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
+
+            if node.state == self.goal:
+                self.solution = self.backtrack(node)
+                return
+
+            self.explored.add(node.state)
+
+            for action in self.jump_directions(node):
+                state = self.jump(node.state, DIRECTIONS[action])
+                if state is None or state in self.explored:
+                    continue
+                cost = (node.cost + abs(state[0] - node.state[0])
+                        + abs(state[1] - node.state[1]))
+                if cost < best.get(state, cost + 1):
+                    best[state] = cost
+                    frontier.add(Node(state, node, action, cost))
+
+    def jump_directions(self, node):
+        """
+        Returns the actions worth jumping in from a jump point: all of
+        them from the start, otherwise straight on and both turns.
+        """
+        if node.parent is None:
+            return list(DIRECTIONS)
+        if node.action in ("left", "right"):
+            return [node.action, "up", "down"]
+        return [node.action, "left", "right"]
+
+    def jump(self, state, direction):
+        """
+        Moves from `state` in `direction` until reaching the goal or a
+        cell where a shortest path may turn, and returns that cell, or
+        None if a wall is hit first.
+        """
+        (row, col), (drow, dcol) = state, direction
+        walkable = self.walkable
+        while True:
+            row += drow
+            col += dcol
+            if not walkable(row, col):
+                return None
+            if (row, col) == self.goal:
+                return (row, col)
+            if dcol:
+                # Moving sideways, a cell above or below becomes open
+                if (walkable(row - 1, col) and not walkable(row - 1, col - dcol)
+                        or walkable(row + 1, col)
+                        and not walkable(row + 1, col - dcol)):
+                    return (row, col)
+            else:
+                # Moving vertically, a cell to either side becomes open
+                # or a sideways jump from here finds a jump point
+                if (walkable(row, col - 1) and not walkable(row - drow, col - 1)
+                        or walkable(row, col + 1)
+                        and not walkable(row - drow, col + 1)):
+                    return (row, col)
+                if (self.jump((row, col), (0, 1)) is not None
+                        or self.jump((row, col), (0, -1)) is not None):
+                    return (row, col)
+
+    def backtrack(self, node):
+        """
+        Returns the (actions, cells) of the path leading to `node`,
+        filling in the cells jumped over between consecutive nodes.
+        """
+        actions = []
+        cells = []
+        while node.parent is not None:
+            row, col = node.state
+            drow, dcol = DIRECTIONS[node.action]
+            while (row, col) != node.parent.state:
+                actions.append(node.action)
+                cells.append((row, col))
+                row -= drow
+                col -= dcol
+            node = node.parent
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+    def solve_with(self, strategy):
+        """
+        Solves the maze with one of STRATEGIES and returns the time
+        taken in seconds.
+        """
+        start = time.perf_counter()
+        if strategy == "dfs":
+            self.solve(StackFrontier())
+        elif strategy == "bfs":
+            self.solve(QueueFrontier())
+        elif strategy == "grid":
+            self.solve_grid()
+        elif strategy == "greedy":
+            self.solve_best_first(lambda node: self.heuristic(node.state))
+        elif strategy == "astar":
+            self.solve_best_first(self.astar_priority)
+        elif strategy == "dijkstra":
+            self.solve_best_first(lambda node: node.cost)
+        elif strategy == "jps":
+            self.solve_jump_point()
+        else:
+            raise ValueError(f"unknown strategy {strategy}")
+        return time.perf_counter() - start
+
+    def path_cost(self):
+        return sum(self.cost(cell) for cell in self.solution[1])
+
+
+def main():
+    args = sys.argv[1:]
+    show = "--show" in args
+    args = [arg for arg in args if arg != "--show"]
+    if not args or any(arg not in STRATEGIES for arg in args[1:]):
+        sys.exit(f"Usage: python maze.py maze.txt [--show] "
+                 f"[{' | '.join(STRATEGIES)} ...]")
+
+    maze = Maze(args[0])
+    strategies = args[1:] or [
+        strategy for strategy in STRATEGIES
+        if strategy != "jps" or not maze.costs
+    ]
+    print(f"Maze {maze.height}x{maze.width}")
+    print(f"{'strategy':<10}{'explored':>10}{'length':>10}{'cost':>10}{'seconds':>10}")
+    for strategy in strategies:
+        try:
+            elapsed = maze.solve_with(strategy)
+        except Exception as e:
+            print(f"{strategy:<10}{str(e):>40}")
+            continue
+        print(f"{strategy:<10}{maze.num_explored:>10}"
+              f"{len(maze.solution[0]):>10}{maze.path_cost():>10}"
+              f"{elapsed:>10.3f}")
+        if show:
+            maze.print()
+
+
+if __name__ == "__main__":
+    main()
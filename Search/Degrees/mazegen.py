@@ -0,0 +1,215 @@
+import random
+import sys
+
+WALL = ord("#")
+PATH = ord(" ")
+
+USAGE = ("Usage: python mazegen.py [backtracker|prim|random] height width "
+         "maze.txt [--density D] [--seed N]")
+
+
+def main():
+    options = parse_options(sys.argv[1:])
+    if options is None:
+        sys.exit(USAGE)
+    algorithm, height, width, filename, density, seed = options
+    try:
+        grid = generate(algorithm, height, width, random.Random(seed), density)
+    except ValueError as e:
+        sys.exit(str(e))
+    write_maze(filename, grid, width)
+    print(f"{height}x{width} {algorithm} maze written to {filename}.")
+
+
+def parse_options(args):
+    """
+    Returns (algorithm, height, width, filename, density, seed) parsed
+    from command line arguments, or None if they are invalid.
+    """
+    density = 0.25
+    seed = None
+    rest = iter(args)
+    positional = []
+    try:
+        for arg in rest:
+            if arg == "--density":
+                density = float(next(rest))
+            elif arg == "--seed":
+                seed = int(next(rest))
+            elif arg.startswith("--"):
+                return None
+            else:
+                positional.append(arg)
+        if len(positional) != 4 or positional[0] not in ALGORITHMS:
+            return None
+        if not 0 <= density < 1:
+            return None
+        algorithm, height, width, filename = positional
+        return algorithm, int(height), int(width), filename, density, seed
+    except (StopIteration, ValueError):
+        return None
+
+
+def generate(algorithm, height, width, rng, density=0.25):
+    """
+    Returns a maze from one of ALGORITHMS as a bytearray of `height`
+    rows of `width` characters in the maze file format. Raises
+    ValueError if no such maze fits.
+    """
+    return ALGORITHMS[algorithm](height, width, rng, density)
+
+
+def carver(height, width):
+    """
+    Returns an all-wall grid and helpers for carving a perfect maze
+    into it. Cells sit at odd rows and columns, numbered row by row,
+    with the walls between them at even ones.
+    """
+    rows = (height - 1) // 2
+    cols = (width - 1) // 2
+    if rows * cols < 2:
+        raise ValueError("maze is too small")
+    grid = bytearray([WALL]) * (height * width)
+
+    def position(cell):
+        row, col = divmod(cell, cols)
+        return (2 * row + 1) * width + 2 * col + 1
+
+    def neighbors(cell):
+        row, col = divmod(cell, cols)
+        result = []
+        if row > 0:
+            result.append(cell - cols)
+        if row < rows - 1:
+            result.append(cell + cols)
+        if col > 0:
+            result.append(cell - 1)
+        if col < cols - 1:
+            result.append(cell + 1)
+        return result
+
+    def carve(cell, previous):
+        # Open the cell and the wall between it and the previous one
+        grid[position(cell)] = PATH
+        grid[(position(cell) + position(previous)) // 2] = PATH
+
+    return grid, rows * cols, position, neighbors, carve
+
+
+def recursive_backtracker(height, width, rng, density):
+    """
+    Carves a perfect maze by a randomized depth-first walk, backing up
+    whenever every neighbouring cell has been visited. Its passages are
+    long and winding. `density` is ignored.
+    """
+    grid, num_cells, position, neighbors, carve = carver(height, width)
+    visited = bytearray(num_cells)
+    visited[0] = 1
+    grid[position(0)] = PATH
+    stack = [0]
+    while stack:
+        cell = stack[-1]
+        unvisited = [n for n in neighbors(cell) if not visited[n]]
+        if not unvisited:
+            stack.pop()
+            continue
+        n = rng.choice(unvisited)
+        visited[n] = 1
+        carve(n, cell)
+        stack.append(n)
+    place_ends(grid, position(0), position(num_cells - 1))
+    return grid
+
+
+def prim(height, width, rng, density):
+    """
+    Carves a perfect maze by randomized Prim's algorithm, joining a
+    random frontier cell to the maze at each step. Its passages are
+    short with many dead ends. `density` is ignored.
+    """
+    grid, num_cells, position, neighbors, carve = carver(height, width)
+
+    # 0 for cells not yet seen, 1 on the frontier, 2 in the maze
+    state = bytearray(num_cells)
+    state[0] = 2
+    grid[position(0)] = PATH
+    frontier = []
+    for n in neighbors(0):
+        state[n] = 1
+        frontier.append(n)
+
+    while frontier:
+        # Remove a random frontier cell by swapping it to the end
+        i = rng.randrange(len(frontier))
+        frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        cell = frontier.pop()
+
+        carve(cell, rng.choice([n for n in neighbors(cell) if state[n] == 2]))
+        state[cell] = 2
+        for n in neighbors(cell):
+            if state[n] == 0:
+                state[n] = 1
+                frontier.append(n)
+    place_ends(grid, position(0), position(num_cells - 1))
+    return grid
+
+
+def random_fill(height, width, rng, density):
+    """
+    Makes a walled maze whose inner cells are each a wall with
+    probability `density`, from one corner to the opposite one. The
+    cells beside both ends are kept open, but above a density of
+    about 0.4 there is usually no solution.
+    """
+    if height < 3 or width < 3 or (height - 2) * (width - 2) < 2:
+        raise ValueError("maze is too small")
+    # Random bytes below the threshold become walls
+    threshold = min(256, int(density * 256))
+    cells = bytes.maketrans(bytes(range(256)),
+                            bytes([WALL]) * threshold
+                            + bytes([PATH]) * (256 - threshold))
+    grid = bytearray([WALL]) * width
+    for _ in range(height - 2):
+        grid.append(WALL)
+        grid.extend(rng.randbytes(width - 2).translate(cells))
+        grid.append(WALL)
+    grid.extend(bytes([WALL]) * width)
+
+    start = width + 1
+    goal = (height - 2) * width + width - 2
+    for position in (start + 1, start + width, goal - 1, goal - width):
+        if grid[position] == WALL and not is_border(position, height, width):
+            grid[position] = PATH
+    place_ends(grid, start, goal)
+    return grid
+
+
+def is_border(position, height, width):
+    row, col = divmod(position, width)
+    return row in (0, height - 1) or col in (0, width - 1)
+
+
+def place_ends(grid, start, goal):
+    grid[start] = ord("A")
+    grid[goal] = ord("B")
+
+
+def write_maze(filename, grid, width):
+    """
+    Writes a generated grid to a maze file, one row per line.
+    """
+    with open(filename, "wb") as f:
+        for start in range(0, len(grid), width):
+            f.write(grid[start:start + width])
+            f.write(b"\n")
+
+
+ALGORITHMS = {
+    "backtracker": recursive_backtracker,
+    "prim": prim,
+    "random": random_fill,
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+
+
+class NameIndex():
+    """
+    Index over distinct names for prefix completion and
+    typo-tolerant lookup, ignoring case.
+
+    Names are kept sorted by their lowercase form, so a prefix
+    matches one contiguous run found by bisection. Fuzzy lookup
+    counts the trigrams that names of about the query's length share
+    with it, then ranks those sharing enough by edit distance; the
+    trigram postings are built on the first fuzzy lookup.
+    """
+
+    def __init__(self, names):
+        display = {}
+        for name in names:
+            display.setdefault(name.lower(), name)
+        self.keys = sorted(display)
+        self.names = [display[key] for key in self.keys]
+        self.trigrams = None
+
+    def build_trigrams(self):
+        """
+        Maps every trigram to the positions of the names containing
+        it, by the length of the name.
+        """
+        trigrams = {}
+        for position, key in enumerate(self.keys):
+            for trigram in set(name_trigrams(key)):
+                lengths = trigrams.setdefault(trigram, {})
+                positions = lengths.get(len(key))
+                if positions is None:
+                    lengths[len(key)] = [position]
+                else:
+                    positions.append(position)
+        self.trigrams = {
+            trigram: {length: array("i", positions)
+                      for length, positions in lengths.items()}
+            for trigram, lengths in trigrams.items()
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`,
+        in alphabetical order.
+        """
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        return self.names[start:min(end, start + limit)]
+
+    def fuzzy(self, name, limit=5, max_distance=2):
+        """
+        Returns up to `limit` names within `max_distance` edits of
+        `name`, closest first.
+        """
+        if self.trigrams is None:
+            self.build_trigrams()
+        key = name.lower()
+        query = set(name_trigrams(key))
+        lengths = range(max(0, len(key) - max_distance),
+                        len(key) + max_distance + 1)
+
+        # Only names within `max_distance` of the query's length can
+        # be close enough, so only their postings are counted
+        postings = []
+        for trigram in query:
+            by_length = self.trigrams.get(trigram)
+            if by_length is not None:
+                postings.extend(by_length[length] for length in lengths
+                                if length in by_length)
+        shared = Counter(chain.from_iterable(postings))
+
+        # Names within d edits share all but at most 3d of the
+        # query's trigrams, so anything sharing fewer cannot match
+        needed = max(1, len(query) - 3 * max_distance)
+        matches = []
+        for position, count in shared.items():
+            if count < needed:
+                continue
+            candidate = self.keys[position]
+            distance = edit_distance(key, candidate, max_distance)
+            if distance is not None:
+                matches.append((distance, -count, candidate, position))
+        matches.sort()
+        return [self.names[position] for *_, position in matches[:limit]]
+
+
+def name_trigrams(key):
+    """
+    Returns the trigrams of a lowercase name, padded so that its
+    start and end form trigrams of their own.
+    """
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between two strings, or None
+    if it is greater than `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+
+    # A shared prefix or suffix costs no edits
+    shorter = min(len(a), len(b))
+    start = 0
+    while start < shorter and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < shorter - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a or not b:
+        return max(len(a), len(b))
+
+    # Only cells within `limit` of the diagonal can be within `limit`;
+    # the rest are left at limit + 1, which no match passes through
+    over = limit + 1
+    previous = [min(j, over) for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = min(i, over)
+        for j in range(low, high + 1):
+            current[j] = min(previous[j] + 1,
+                             current[j - 1] + 1,
+                             previous[j - 1] + (char_a != b[j - 1]))
+        if min(current[low - 1:high + 1]) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
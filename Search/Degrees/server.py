@@ -0,0 +1,333 @@
+import json
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+USAGE = ("Usage: python server.py batch [directory] [--workers N]\n"
+         "       python server.py http [directory] [--workers N] "
+         "[--port N | --socket PATH]")
+
+
+class LatencyStats():
+    """
+    Thread-safe record of per-query latencies in milliseconds,
+    keeping only the most recent `window` of them.
+    """
+
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            self.count += 1
+
+    def summary(self):
+        """
+        Returns the query count and the latency percentiles of the
+        most recent queries.
+        """
+        with self.lock:
+            latencies = sorted(self.latencies)
+            count = self.count
+        if not latencies:
+            return {"queries": 0}
+        summary = {"queries": count, "window": len(latencies)}
+        for percentile in (50, 90, 99):
+            # Nearest-rank percentile
+            rank = max(1, -(-percentile * len(latencies) // 100))
+            summary[f"p{percentile}_ms"] = round(latencies[rank - 1], 3)
+        summary["max_ms"] = round(latencies[-1], 3)
+        return summary
+
+
+def main():
+    options = parse_options(sys.argv[1:])
+    if options is None:
+        sys.exit(USAGE)
+    mode, directory, workers, port, socket_path = options
+
+    # Warm the graph in this process and in every worker
+    degrees.load_graph(directory)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=degrees.load_graph,
+                             initargs=(directory,)) as pool:
+        if mode == "batch":
+            run_batch(pool, sys.stdin, sys.stdout)
+        else:
+            run_http(pool, port, socket_path)
+
+
+def parse_options(args):
+    """
+    Returns (mode, directory, workers, port, socket path) parsed from
+    command line arguments, or None if they are invalid.
+    """
+    if not args or args[0] not in ("batch", "http"):
+        return None
+    mode = args[0]
+    directory = "small"
+    workers = os.cpu_count()
+    port = 8000
+    socket_path = None
+
+    rest = iter(args[1:])
+    positional = []
+    try:
+        for arg in rest:
+            if arg == "--workers":
+                workers = int(next(rest))
+            elif arg == "--port":
+                port = int(next(rest))
+            elif arg == "--socket":
+                socket_path = next(rest)
+            elif arg.startswith("--"):
+                return None
+            else:
+                positional.append(arg)
+    except (StopIteration, ValueError):
+        return None
+
+    if len(positional) > 1:
+        return None
+    if positional:
+        directory = positional[0]
+    return mode, directory, workers, port, socket_path
+
+
+def resolve(query, key):
+    """
+    Returns the person id a query refers to under `key`, either
+    directly as `<key>_id` or by name, narrowed by `<key>_birth` if
+    given. Raises ValueError if the person is unknown or the name is
+    ambiguous.
+    """
+    if f"{key}_id" in query:
+        person_id = str(query[f"{key}_id"])
+        if degrees.graph.find_person(person_id) is None:
+            raise ValueError(f"unknown {key}_id {person_id}")
+        return person_id
+
+    name = query.get(key)
+    if not isinstance(name, str):
+        raise ValueError(f"missing {key}")
+    person_ids = degrees.people_named(name, query.get(f"{key}_birth"))
+    if not person_ids:
+        suggestions = degrees.suggest_names(name)
+        if suggestions:
+            raise ValueError(f"person not found: {name}, "
+                             f"did you mean: {', '.join(suggestions)}")
+        raise ValueError(f"person not found: {name}")
+    if len(person_ids) > 1:
+        raise ValueError(f"ambiguous name {name}, use {key}_birth "
+                         f"or {key}_id: {', '.join(person_ids)}")
+    return person_ids[0]
+
+
+def answer(query):
+    """
+    Answers one separation query in a worker process. Returns a
+    JSON-serializable result, with any failure as its error.
+    """
+    result = {}
+    if "id" in query:
+        result["id"] = query["id"]
+    try:
+        source = resolve(query, "source")
+        target = resolve(query, "target")
+        path = degrees.shortest_path(source, target, bidirectional=True)
+        if path is None:
+            result["degrees"] = None
+        else:
+            result["degrees"] = len(path)
+            result["path"] = [
+                {"movie_id": movie_id, "movie": degrees.movie_title(movie_id),
+                 "person_id": person_id, "person": degrees.person_name(person_id)}
+                for movie_id, person_id in path
+            ]
+    except ValueError as e:
+        result["error"] = str(e)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def parse_query(line):
+    """
+    Parses one JSON query object, returning (query, None), or
+    (None, error) if the line is not a JSON object.
+    """
+    try:
+        query = json.loads(line)
+    except json.JSONDecodeError as e:
+        return None, f"invalid JSON: {e}"
+    if not isinstance(query, dict):
+        return None, "query must be a JSON object"
+    return query, None
+
+
+class Pending():
+    """
+    A query submitted to the worker pool, timed from its submission
+    until its result arrives.
+    """
+
+    def __init__(self, pool, query):
+        self.start = time.perf_counter()
+        self.finish = None
+        self.query = query
+        self.future = pool.submit(answer, query)
+        self.future.add_done_callback(self.done)
+
+    def done(self, future):
+        self.finish = time.perf_counter()
+
+    def result(self):
+        try:
+            result = self.future.result()
+        except Exception as e:
+            # The worker itself failed, as when the pool is broken
+            result = {"error": f"{type(e).__name__}: {e}"}
+            if "id" in self.query:
+                result["id"] = self.query["id"]
+        # Waiters wake before done callbacks run, so it may not be set
+        finish = self.finish or time.perf_counter()
+        result["latency_ms"] = round((finish - self.start) * 1000, 3)
+        return result
+
+
+def answer_all(pool, lines, stats, window=256):
+    """
+    Yields results for JSON-lines queries in input order, fanning
+    independent queries out over the worker pool. Lines are read as
+    results are written, with at most `window` queries in flight.
+    """
+    pending = deque()
+    for line in lines:
+        if line.strip():
+            query, error = parse_query(line)
+            pending.append({"error": error} if error is not None
+                           else Pending(pool, query))
+        if len(pending) >= window:
+            yield finish(pending.popleft(), stats)
+    while pending:
+        yield finish(pending.popleft(), stats)
+
+
+def finish(entry, stats):
+    """
+    Returns the result of a line from answer_all(): its parse error,
+    or the answer to its query once it is ready, recording its latency.
+    """
+    if isinstance(entry, dict):
+        return entry
+    result = entry.result()
+    stats.add(result["latency_ms"])
+    return result
+
+
+def run_batch(pool, infile, outfile):
+    """
+    Answers JSON-lines queries from `infile`, writing one JSON result
+    per line to `outfile` and latency percentiles to stderr.
+    """
+    stats = LatencyStats()
+    for result in answer_all(pool, infile, stats):
+        outfile.write(json.dumps(result) + "\n")
+    outfile.flush()
+    print(json.dumps(stats.summary()), file=sys.stderr)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    GET /path?source=NAME&target=NAME (or source_id/target_id)
+    answers one query, POST /path answers a JSON-lines batch and
+    GET /stats reports latency percentiles.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self.send_json(200, self.server.stats.summary())
+        elif url.path == "/path":
+            query = {key: values[-1]
+                     for key, values in parse_qs(url.query).items()}
+            result = next(answer_all(self.server.pool, [json.dumps(query)],
+                                     self.server.stats))
+            self.send_json(400 if "error" in result else 200, result)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/path":
+            self.send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        lines = self.rfile.read(length).decode("utf-8").splitlines()
+        results = answer_all(self.server.pool, lines, self.server.stats)
+        body = "".join(json.dumps(result) + "\n" for result in results)
+        self.send_body(200, body, "application/x-ndjson")
+
+    def send_json(self, status, value):
+        self.send_body(status, json.dumps(value) + "\n", "application/json")
+
+    def send_body(self, status, body, content_type):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def run_http(pool, port, socket_path):
+    """
+    Serves queries over HTTP on a local TCP port or a Unix socket
+    until interrupted.
+    """
+    if socket_path is not None:
+        # Replace a socket left behind by an earlier server, but never
+        # anything else
+        if os.path.exists(socket_path):
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                sys.exit(f"{socket_path} exists and is not a socket")
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, QueryHandler)
+        print(f"Serving on {socket_path}", file=sys.stderr)
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", port), QueryHandler)
+        print(f"Serving on http://127.0.0.1:{port}", file=sys.stderr)
+    server.pool = pool
+    server.stats = LatencyStats()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None:
+            os.remove(socket_path)
+        print(json.dumps(server.stats.summary()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from graph import Graph
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 1
+FILENAME = "degrees.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Magic, version, then (size, mtime_ns) for every source CSV
+HEADER = struct.Struct(f"<8sI4x{'qq' * len(SOURCES)}")
+
+# Sections in file order, each stored as (offset, length in bytes)
+SECTIONS = [
+    "person_offsets", "person_movies", "movie_offsets", "movie_stars",
+    "person_id_offsets", "person_id_data",
+    "person_name_offsets", "person_name_data",
+    "person_birth_offsets", "person_birth_data",
+    "movie_id_offsets", "movie_id_data",
+    "movie_title_offsets", "movie_title_data",
+    "people_by_id", "movies_by_id", "people_by_name",
+]
+TABLE = struct.Struct(f"<{'qq' * len(SECTIONS)}")
+TYPECODES = {
+    "person_offsets": "q", "movie_offsets": "q",
+    "person_movies": "i", "movie_stars": "i",
+    "people_by_id": "i", "movies_by_id": "i", "people_by_name": "i",
+}
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as UTF-8 bytes in one
+    buffer, with string `i` at `data[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class MappedGraph(Graph):
+    """
+    Graph whose arrays and strings are views into a memory-mapped
+    snapshot file. Lookups by id or name bisect over sorted index
+    permutations stored in the file, so nothing is built at load time.
+    """
+
+    def __init__(self, buffer, sections):
+        self.buffer = buffer
+        views = {}
+        for name, (offset, length) in zip(SECTIONS, sections):
+            view = memoryview(buffer)[offset:offset + length]
+            views[name] = view.cast(TYPECODES[name]) if name in TYPECODES else view
+
+        self.person_offsets = views["person_offsets"]
+        self.person_movies = views["person_movies"]
+        self.movie_offsets = views["movie_offsets"]
+        self.movie_stars = views["movie_stars"]
+        self.person_ids = StringTable(
+            views["person_id_offsets"].cast("q"), views["person_id_data"])
+        self.person_names = StringTable(
+            views["person_name_offsets"].cast("q"), views["person_name_data"])
+        self.person_births = StringTable(
+            views["person_birth_offsets"].cast("q"), views["person_birth_data"])
+        self.movie_ids = StringTable(
+            views["movie_id_offsets"].cast("q"), views["movie_id_data"])
+        self.movie_titles = StringTable(
+            views["movie_title_offsets"].cast("q"), views["movie_title_data"])
+        self.people_by_id = views["people_by_id"]
+        self.movies_by_id = views["movies_by_id"]
+        self.people_by_name = views["people_by_name"]
+
+    def find_person(self, person_id):
+        return find_sorted(self.people_by_id, self.person_ids, person_id)
+
+    def find_movie(self, movie_id):
+        return find_sorted(self.movies_by_id, self.movie_ids, movie_id)
+
+    def find_people(self, name):
+        name = name.lower()
+        names = self.person_names
+        order = self.people_by_name
+        i = bisect_left(order, name, key=lambda j: names[j].lower())
+        people = []
+        while i < len(order) and names[order[i]].lower() == name:
+            people.append(order[i])
+            i += 1
+        return people
+
+
+def find_sorted(order, table, value):
+    """
+    Returns the index in `table` equal to `value`, given `order`,
+    a permutation of the table's indices in sorted order, or None.
+    """
+    i = bisect_left(order, value, key=lambda j: table[j])
+    if i < len(order) and table[order[i]] == value:
+        return order[i]
+    return None
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python snapshot.py directory")
+    directory = sys.argv[1]
+    write_snapshot(Graph.from_csv(directory), directory)
+    print(f"Snapshot written to {snapshot_path(directory)}.")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def fingerprint(directory):
+    """
+    Returns the (size, mtime_ns) pairs of the source CSV files.
+    """
+    values = []
+    for source in SOURCES:
+        stat = os.stat(os.path.join(directory, source))
+        values.extend([stat.st_size, stat.st_mtime_ns])
+    return values
+
+
+def encode_strings(strings):
+    """
+    Returns (offsets, data) for storing `strings` as a StringTable.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = array("q", [0])
+    total = 0
+    for string in encoded:
+        total += len(string)
+        offsets.append(total)
+    return offsets, b"".join(encoded)
+
+
+def write_snapshot(graph, directory):
+    """
+    Writes `graph` as a snapshot of the CSV files in `directory`.
+    """
+    people = range(len(graph.person_ids))
+    movies = range(len(graph.movie_ids))
+    person_ids = encode_strings(graph.person_ids)
+    person_names = encode_strings(graph.person_names)
+    person_births = encode_strings(graph.person_births)
+    movie_ids = encode_strings(graph.movie_ids)
+    movie_titles = encode_strings(graph.movie_titles)
+    sections = [
+        graph.person_offsets, graph.person_movies,
+        graph.movie_offsets, graph.movie_stars,
+        *person_ids, *person_names, *person_births,
+        *movie_ids, *movie_titles,
+        array("i", sorted(people, key=lambda i: graph.person_ids[i])),
+        array("i", sorted(movies, key=lambda m: graph.movie_ids[m])),
+        array("i", sorted(people, key=lambda i: graph.person_names[i].lower())),
+    ]
+
+    # Lay sections out after the header and table, 8-byte aligned
+    table = []
+    position = HEADER.size + TABLE.size
+    for section in sections:
+        position += -position % 8
+        length = len(section) * getattr(section, "itemsize", 1)
+        table.extend([position, length])
+        position += length
+
+    # Write to a temporary file first so readers never see a partial one
+    path = snapshot_path(directory)
+    partial = f"{path}.partial"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, *fingerprint(directory)))
+        f.write(TABLE.pack(*table))
+        for section, offset in zip(sections, table[::2]):
+            f.write(bytes(offset - f.tell()))
+            f.write(section if isinstance(section, bytes) else section.tobytes())
+    os.replace(partial, path)
+
+
+def load_snapshot(directory):
+    """
+    Returns a MappedGraph for the snapshot in `directory`, or None
+    if there is no snapshot or the source CSV files have changed
+    since it was written.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < HEADER.size + TABLE.size:
+        return None
+    magic, version, *sources = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        return None
+    try:
+        if sources != fingerprint(directory):
+            return None
+    except OSError:
+        return None
+
+    table = TABLE.unpack_from(buffer, HEADER.size)
+    return MappedGraph(buffer, list(zip(table[::2], table[1::2])))
+
+
+if __name__ == "__main__":
+    main()
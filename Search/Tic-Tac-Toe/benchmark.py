@@ -0,0 +1,312 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import parallel
+import tictactoe as ttt
+from mnk import MNKGame
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        sys.exit("Usage: python benchmark.py "
+                 f"[{'|'.join(COMMANDS)}] [arguments...]")
+    COMMANDS[sys.argv[1]](*sys.argv[2:])
+
+
+def plain_minimax(board, counter):
+    """
+    The original minimax, searching every position without pruning or
+    a transposition table and counting them in counter[0]. Returns
+    (value, action).
+    """
+    counter[0] += 1
+    if ttt.terminal(board):
+        return ttt.utility(board), None
+
+    maximizing = ttt.player(board) == ttt.X
+    best_value = float("-inf") if maximizing else float("inf")
+    best_action = None
+    for action in ttt.actions(board):
+        action_value = plain_minimax(ttt.result(board, action), counter)[0]
+        if (action_value > best_value if maximizing
+                else action_value < best_value):
+            best_value = action_value
+            best_action = action
+    return best_value, best_action
+
+
+def positions(depth):
+    """
+    Returns the distinct non-terminal boards reachable in at most
+    `depth` moves, the initial board first.
+    """
+    found = {}
+    layer = [ttt.initial_state()]
+    for _ in range(depth + 1):
+        next_layer = []
+        for board in layer:
+            key = str(board)
+            if key in found or ttt.terminal(board):
+                continue
+            found[key] = board
+            next_layer.extend(ttt.result(board, action)
+                              for action in ttt.actions(board))
+        layer = next_layer
+    return list(found.values())
+
+
+def pruning(depth="1"):
+    """
+    Compares the positions searched by plain minimax and by alpha-beta
+    with move ordering, for every board up to `depth` moves in, and
+    checks that both choose the same action.
+    """
+    print(f"{'moves':>6}{'minimax':>12}{'alpha-beta':>12}{'pruned':>9}"
+          f"{'minimax (s)':>13}{'alpha-beta (s)':>16}")
+    totals = [0, 0, 0, 0]
+    mismatches = 0
+    for board in positions(int(depth)):
+        counter = [0]
+        start = time.perf_counter()
+        _, expected = plain_minimax(board, counter)
+        plain_time = time.perf_counter() - start
+
+        ttt.nodes = 0
+        start = time.perf_counter()
+        action = ttt.minimax_alphabeta(board)
+        pruned_time = time.perf_counter() - start
+        mismatches += action != expected
+
+        moves = sum(cell is not ttt.EMPTY for row in board for cell in row)
+        print(f"{moves:>6}{counter[0]:>12}{ttt.nodes:>12}"
+              f"{1 - ttt.nodes / counter[0]:>9.1%}"
+              f"{plain_time:>13.3f}{pruned_time:>16.4f}")
+        for i, amount in enumerate((counter[0], ttt.nodes,
+                                    plain_time, pruned_time)):
+            totals[i] += amount
+
+    print(f"{'total':>6}{totals[0]:>12}{totals[1]:>12}"
+          f"{1 - totals[1] / totals[0]:>9.1%}"
+          f"{totals[2]:>13.3f}{totals[3]:>16.4f}")
+    print(f"{mismatches} positions where the chosen actions differ.")
+
+
+def engines(depth="2", repeat="20000"):
+    """
+    Compares the list-of-lists engine with the bitboard engine: the
+    cost of making a move, then alpha-beta searches from every board
+    up to `depth` moves in, checking both choose the same action.
+    """
+    board = ttt.initial_state()
+    position = bitboard.Bitboard()
+    repeat = int(repeat)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ttt.result(board, (1, 1))
+    list_move = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        position.move(4)
+        position.undo(4)
+    bit_move = (time.perf_counter() - start) / repeat
+    print(f"Move: {list_move * 1e6:.2f} us with result(), "
+          f"{bit_move * 1e6:.2f} us with move() and undo().")
+
+    boards = positions(int(depth))
+    mismatches = 0
+    timings = []
+    for label, search in (("lists", ttt.minimax_alphabeta),
+                          ("bitboard", bitboard.minimax)):
+        ttt.nodes = bitboard.nodes = 0
+        start = time.perf_counter()
+        actions = [search(board) for board in boards]
+        timings.append((label, time.perf_counter() - start,
+                        ttt.nodes + bitboard.nodes))
+        if label == "lists":
+            expected = actions
+        else:
+            mismatches = sum(a != b for a, b in zip(actions, expected))
+
+    print(f"{'engine':<10}{'positions':>12}{'nodes':>10}{'time (s)':>10}"
+          f"{'us/node':>10}")
+    for label, elapsed, nodes in timings:
+        print(f"{label:<10}{len(boards):>12}{nodes:>10}{elapsed:>10.3f}"
+              f"{elapsed / nodes * 1e6:>10.2f}")
+    print(f"{mismatches} positions where the chosen actions differ.")
+
+
+def split(workers=None, depth="5", split_depth="1"):
+    """
+    Times the root-split parallel searches against the sequential ones
+    with 1 up to `workers` processes: a fixed-depth search of a 7x7,
+    4 in a row middle game, and tictactoe.minimax from the empty board
+    with an empty transposition table. Checks that each returns the
+    same result as the sequential search.
+    """
+    workers = int(workers or os.cpu_count())
+    depth = int(depth)
+    split_depth = int(split_depth)
+
+    game = MNKGame(7, 7, 4)
+    board = game.initial_state()
+    for action in ((3, 3), (3, 4), (2, 4), (4, 2), (2, 3), (2, 2)):
+        board = game.result(board, action)
+
+    start = time.perf_counter()
+    expected_search = game.search(board, depth)
+    search_time = time.perf_counter() - start
+
+    ttt.table[:] = bytes(len(ttt.table))
+    start = time.perf_counter()
+    expected_minimax = ttt.minimax(ttt.initial_state())
+    minimax_time = time.perf_counter() - start
+    print(f"Sequential: {search_time:.3f}s for the m,n,k search to depth "
+          f"{depth}, {minimax_time:.3f}s for tic-tac-toe minimax.")
+
+    print(f"{'workers':>8}{'m,n,k (s)':>11}{'speedup':>9}"
+          f"{'minimax (s)':>13}{'speedup':>9}{'same':>6}")
+    for count in range(1, workers + 1):
+        # Forked workers would otherwise start with the filled table
+        ttt.table[:] = bytes(len(ttt.table))
+        with ProcessPoolExecutor(count) as executor:
+            # Start the worker processes before timing
+            list(executor.map(abs, range(count)))
+
+            start = time.perf_counter()
+            result = parallel.search(game, board, depth, executor, split_depth)
+            parallel_search_time = time.perf_counter() - start
+            same = result == expected_search
+
+            start = time.perf_counter()
+            action = parallel.minimax(ttt.initial_state(), executor,
+                                      split_depth)
+            parallel_minimax_time = time.perf_counter() - start
+            same = same and action == expected_minimax
+
+        print(f"{count:>8}{parallel_search_time:>11.3f}"
+              f"{search_time / parallel_search_time:>9.2f}"
+              f"{parallel_minimax_time:>13.3f}"
+              f"{minimax_time / parallel_minimax_time:>9.2f}"
+              f"{'yes' if same else 'NO':>6}")
+
+
+def perft(board, depth, counts, ply=0):
+    """
+    Adds to counts[d] the number of move sequences from `board` that
+    reach a position d moves later, for d up to `depth`, as chess
+    move-generator tests do. Games end at terminal positions.
+    """
+    counts[ply] += 1
+    if ply == depth or ttt.terminal(board):
+        return
+    for action in ttt.actions(board):
+        perft(ttt.result(board, action), depth, counts, ply + 1)
+
+
+def play_games(engine, games):
+    """
+    Plays `games` games of `engine` against itself from the initial
+    board and returns the number of moves made.
+    """
+    moves = 0
+    for _ in range(games):
+        board = ttt.initial_state()
+        while not ttt.terminal(board):
+            board = ttt.result(board, engine(board))
+            moves += 1
+    return moves
+
+
+def throughput(output="-", depth="9", games="100", repeat="20",
+               engine="minimax"):
+    """
+    Measures the engine in tictactoe.py: perft counts and rates from
+    the initial board to `depth`, `games` self-play games of `engine`,
+    and the cost per call of actions, result, winner and terminal over
+    every non-terminal board. Writes JSON to `output`, or to standard
+    output for "-", for comparing runs over time.
+    """
+    depth = int(depth)
+    games = int(games)
+    repeat = int(repeat)
+    report = {}
+
+    counts = [0] * (depth + 1)
+    start = time.perf_counter()
+    perft(ttt.initial_state(), depth, counts)
+    elapsed = time.perf_counter() - start
+    report["perft"] = {
+        "depth": depth,
+        "counts": counts,
+        "seconds": elapsed,
+        "positions_per_second": sum(counts) / elapsed,
+    }
+
+    search = ENGINES[engine]
+    if engine == "minimax":
+        # Time the table lookups, not filling the table
+        ttt.minimax(ttt.initial_state())
+    start = time.perf_counter()
+    moves = play_games(search, games)
+    elapsed = time.perf_counter() - start
+    report["self_play"] = {
+        "engine": engine,
+        "games": games,
+        "moves": moves,
+        "seconds": elapsed,
+        "games_per_second": games / elapsed,
+    }
+
+    boards = positions(9)
+    moves = [next(iter(ttt.actions(board))) for board in boards]
+    calls = {
+        "actions": lambda: [ttt.actions(board) for board in boards],
+        "result": lambda: [ttt.result(board, action)
+                           for board, action in zip(boards, moves)],
+        "winner": lambda: [ttt.winner(board) for board in boards],
+        "terminal": lambda: [ttt.terminal(board) for board in boards],
+    }
+    report["functions"] = {}
+    for name, call in calls.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            call()
+        elapsed = time.perf_counter() - start
+        report["functions"][name] = {
+            "calls": repeat * len(boards),
+            "ns_per_call": elapsed / (repeat * len(boards)) * 1e9,
+        }
+
+    if output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+# Searches throughput can play games with
+ENGINES = {
+    "minimax": ttt.minimax,
+    "alphabeta": ttt.minimax_alphabeta,
+    "bitboard": bitboard.minimax,
+}
+
+
+COMMANDS = {
+    "pruning": pruning,
+    "engines": engines,
+    "parallel": split,
+    "throughput": throughput,
+}
+
+
+if __name__ == "__main__":
+    main()
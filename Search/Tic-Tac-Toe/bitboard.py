@@ -0,0 +1,161 @@
+"""
+Tic Tac Toe bitboard engine
+"""
+from tictactoe import X, O, EMPTY
+
+# Cell (i, j) is bit 3 * i + j of a player's marks
+FULL = (1 << 9) - 1
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+]
+
+# Whether a player with each of the 512 sets of marks has three in a row
+WINNING = bytes(
+    any(marks & mask == mask for mask in WIN_MASKS) for marks in range(1 << 9)
+)
+
+# Cells in search order: center, corners, edges
+CELL_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Positions visited by negamax(), for measuring searches
+nodes = 0
+
+
+class Bitboard():
+    """
+    A board as the set of X's cells and the set of O's cells, each a
+    9-bit integer. Moves are made and undone in place.
+    """
+
+    def __init__(self, x=0, o=0):
+        self.x = x
+        self.o = o
+        self.count = x.bit_count() + o.bit_count()
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Returns the bitboard of a list-of-lists board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (3 * i + j)
+                elif cell == O:
+                    o |= 1 << (3 * i + j)
+        return cls(x, o)
+
+    def to_board(self):
+        """
+        Returns the list-of-lists board of this bitboard.
+        """
+        return [[X if self.x >> (3 * i + j) & 1
+                 else O if self.o >> (3 * i + j) & 1
+                 else EMPTY
+                 for j in range(3)]
+                for i in range(3)]
+
+    def player(self):
+        return X if self.count % 2 == 0 else O
+
+    def actions(self):
+        """
+        Returns the set of available actions (i, j), built in the same
+        order as tictactoe.actions so that both iterate alike.
+        """
+        empty = ~(self.x | self.o) & FULL
+        return {(cell // 3, cell % 3) for cell in range(9) if empty >> cell & 1}
+
+    def move(self, cell):
+        """
+        Marks `cell` for the player to move.
+        """
+        if self.count % 2 == 0:
+            self.x |= 1 << cell
+        else:
+            self.o |= 1 << cell
+        self.count += 1
+
+    def undo(self, cell):
+        """
+        Takes back the last move, which was made at `cell`.
+        """
+        self.count -= 1
+        if self.count % 2 == 0:
+            self.x &= ~(1 << cell)
+        else:
+            self.o &= ~(1 << cell)
+
+    def winner(self):
+        if WINNING[self.x]:
+            return X
+        if WINNING[self.o]:
+            return O
+        return None
+
+    def terminal(self):
+        return WINNING[self.x] or WINNING[self.o] or self.count == 9
+
+    def utility(self):
+        if WINNING[self.x]:
+            return 1
+        if WINNING[self.o]:
+            return -1
+        return 0
+
+
+def negamax(position, alpha=-1, beta=1):
+    """
+    Returns the value of a position for the player to move if it lies
+    strictly between `alpha` and `beta`, and otherwise a bound beyond
+    the same side, searching with alpha-beta pruning by making and
+    undoing moves on the one bitboard.
+    """
+    global nodes
+    nodes += 1
+
+    # Only the player who just moved can have won
+    if WINNING[position.o if position.count % 2 == 0 else position.x]:
+        return -1
+    if position.count == 9:
+        return 0
+
+    taken = position.x | position.o
+    best = -1
+    for cell in CELL_ORDER:
+        if taken >> cell & 1:
+            continue
+        position.move(cell)
+        value = -negamax(position, -beta, -alpha)
+        position.undo(cell)
+        if value > best:
+            best = value
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+    return best
+
+
+def minimax(board):
+    """
+    Returns the same action as tictactoe.minimax for a list-of-lists
+    board, searching on a bitboard.
+    """
+    position = Bitboard.from_board(board)
+    if position.terminal():
+        return None
+
+    # Of several equally good actions, return the first in
+    # tictactoe.actions order, checking each with a null-window search
+    best = negamax(position)
+    for action in position.actions():
+        cell = 3 * action[0] + action[1]
+        position.move(cell)
+        value = -negamax(position, -best, 1 - best)
+        position.undo(cell)
+        if value >= best:
+            return action
@@ -0,0 +1,355 @@
+"""
+m,n,k-game Player
+"""
+import math
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Value of a won position, less the number of moves taken to win it
+WIN = 10 ** 9
+
+# Boards with at most this many cells search every empty cell;
+# larger ones only search cells next to a mark
+SMALL_BOARD = 16
+
+
+class Timeout(Exception):
+    pass
+
+
+class MNKGame():
+    """
+    Rules and AI for an m,n,k-game, where players take turns marking
+    cells of a board of m rows and n columns and the first to mark k
+    cells in a row, column or diagonal wins. Tic-tac-toe is
+    MNKGame(3, 3, 3).
+
+    Boards are lists of rows as in tictactoe.py, and the methods
+    mirror its functions, so runner.py can play either.
+    """
+
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, m, n, k, time_limit=0.2):
+        if min(m, n, k) < 1 or k > max(m, n):
+            raise ValueError(f"no {k} in a row fits a {m}x{n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.time_limit = time_limit
+
+        # Every line of k cells, as flat indices i * n + j, and the
+        # lines through each cell
+        self.windows = []
+        for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for i in range(m):
+                for j in range(n):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append(
+                            [(i + di * step) * n + j + dj * step
+                             for step in range(k)]
+                        )
+        self.cell_windows = [[] for _ in range(m * n)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(w)
+
+        # Heuristic value of a line holding some of one player's marks
+        # and none of the other's, by the number of marks
+        self.weights = [0] + [4 ** count for count in range(k - 1)] + [WIN]
+
+        # Cells around each cell, and all cells from the center out
+        self.adjacent = [
+            [a * n + b
+             for a in range(max(0, i - 1), min(m, i + 2))
+             for b in range(max(0, j - 1), min(n, j + 2))
+             if (a, b) != (i, j)]
+            for i in range(m) for j in range(n)
+        ]
+        self.center_order = sorted(
+            range(m * n),
+            key=lambda cell: (abs(cell // n - (m - 1) / 2)
+                              + abs(cell % n - (n - 1) / 2))
+        )
+
+        # Statistics of the last search
+        self.nodes = 0
+        self.depth = 0
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        number_of_x = sum(row.count(X) for row in board)
+        number_of_o = sum(row.count(O) for row in board)
+        return X if number_of_x == number_of_o else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j)
+                for i, row in enumerate(board)
+                for j, cell in enumerate(row)
+                if cell == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if (not 0 <= i < self.m or not 0 <= j < self.n
+                or board[i][j] != EMPTY or self.terminal(board)):
+            raise Exception("Invalid move")
+
+        copy_board = [row[:] for row in board]
+        copy_board[i][j] = self.player(board)
+        return copy_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for window in self.windows:
+            first = cells[window[0]]
+            if first != EMPTY and all(cells[cell] == first for cell in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        if winner == X:
+            return 1
+        elif winner == O:
+            return -1
+        return 0
+
+    def minimax(self, board):
+        """
+        Returns the best action found for the current player within
+        the time limit, by alpha-beta searches of increasing depth.
+        The last completed search decides, and positions it cannot see
+        to the end are scored by evaluate().
+        """
+        if self.terminal(board):
+            return None
+
+        position = Position(self, board)
+        self.start_search(time.perf_counter() + self.time_limit)
+
+        moves = self.candidates(position, None)
+        best_move = moves[0]
+        remaining = self.m * self.n - position.moves
+        for depth in range(1, remaining + 1):
+            try:
+                value, move = self.search_root(position, moves, depth)
+            except Timeout:
+                break
+            best_move = move
+            self.depth = depth
+
+            # Search the best move first next time
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(value) >= WIN - remaining:
+                break
+        return divmod(best_move, self.n)
+
+    def search(self, board, depth):
+        """
+        Returns (value, action) for the player to move from a full
+        alpha-beta search to `depth` with no time limit. Unlike
+        minimax, the result only depends on the board and depth.
+        """
+        position = Position(self, board)
+        self.start_search(math.inf)
+        value, move = self.search_root(position, self.root_moves(board), depth)
+        return value, divmod(move, self.n)
+
+    def value(self, board, moves, depth, alpha=-math.inf, beta=math.inf):
+        """
+        Returns the negamax value, for the player to move after them,
+        of playing the flat cell indices `moves` from `board` and
+        searching `depth` more moves: exact if it lies strictly between
+        `alpha` and `beta`, and otherwise a bound beyond the same side.
+        """
+        position = Position(self, board)
+        for cell in moves:
+            position.place(cell)
+        self.start_search(math.inf)
+        return self.negamax(position, depth, alpha, beta, len(moves))
+
+    def root_moves(self, board, moves=()):
+        """
+        Returns the flat cell indices a search from `board` tries first,
+        in its order, after playing `moves`, or none if that ends the game.
+        """
+        position = Position(self, board)
+        for cell in moves:
+            position.place(cell)
+        if position.winner is not None or position.moves == self.m * self.n:
+            return []
+        return self.candidates(position, None)
+
+    def start_search(self, deadline):
+        self.deadline = deadline
+        self.nodes = 0
+        self.depth = 0
+        self.killers = [None] * (self.m * self.n + 1)
+
+    def search_root(self, position, moves, depth):
+        """
+        Returns the value for the player to move and the best of
+        `moves` with a full-width search to `depth`.
+        """
+        alpha = -math.inf
+        best_move = moves[0]
+        for cell in moves:
+            position.place(cell)
+            value = -self.negamax(position, depth - 1, -math.inf, -alpha, 1)
+            position.remove(cell)
+            if value > alpha:
+                alpha = value
+                best_move = cell
+        return alpha, best_move
+
+    def negamax(self, position, depth, alpha, beta, ply):
+        """
+        Returns the value of a position for the player to move if it
+        lies strictly between `alpha` and `beta`, and otherwise a bound
+        beyond the same side. Raises Timeout past the deadline.
+        """
+        self.nodes += 1
+        if self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        # Only the player who just moved can have won
+        if position.winner is not None:
+            return ply - WIN
+        if position.moves == self.m * self.n:
+            return 0
+        if depth == 0:
+            return position.evaluate()
+
+        best = -math.inf
+        for cell in self.candidates(position, self.killers[ply]):
+            position.place(cell)
+            value = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.remove(cell)
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self.killers[ply] = cell
+                        break
+        return best
+
+    def candidates(self, position, killer):
+        """
+        Returns the empty cells worth searching, the killer move first
+        if it is one, then from the center out. On large boards only
+        cells next to a mark are worth searching.
+        """
+        cells = position.cells
+        if self.m * self.n <= SMALL_BOARD or position.moves == 0:
+            moves = [cell for cell in self.center_order if cells[cell] == EMPTY]
+        else:
+            moves = [cell for cell in self.center_order
+                     if cells[cell] == EMPTY
+                     and any(cells[a] != EMPTY for a in self.adjacent[cell])]
+            if not moves:
+                moves = [cell for cell in self.center_order
+                         if cells[cell] == EMPTY]
+        if killer is not None and killer in moves:
+            moves.remove(killer)
+            moves.insert(0, killer)
+        return moves
+
+
+class Position():
+    """
+    A board being searched: a flat list of cells, changed in place by
+    place() and remove(), with the number of each player's marks in
+    every line and the heuristic score kept up to date as it changes.
+    """
+
+    def __init__(self, game, board):
+        self.game = game
+        self.cells = [EMPTY] * (game.m * game.n)
+        self.counts = {X: [0] * len(game.windows), O: [0] * len(game.windows)}
+        self.moves = 0
+        self.score = 0
+        self.winner = None
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell != EMPTY:
+                    self.mark(i * game.n + j, cell, 1)
+                    self.moves += 1
+
+    def to_move(self):
+        return X if self.moves % 2 == 0 else O
+
+    def place(self, cell):
+        self.mark(cell, self.to_move(), 1)
+        self.moves += 1
+
+    def remove(self, cell):
+        self.moves -= 1
+        self.mark(cell, self.to_move(), -1)
+        self.winner = None
+
+    def mark(self, cell, player, change):
+        """
+        Adds (change 1) or takes away (change -1) a player's mark,
+        updating the lines through the cell and the score.
+        """
+        self.cells[cell] = player if change == 1 else EMPTY
+        weights = self.game.weights
+        own = self.counts[player]
+        other = self.counts[O if player == X else X]
+        sign = 1 if player == X else -1
+        for w in self.game.cell_windows[cell]:
+            # A line scores for the only player with marks in it
+            if other[w]:
+                if not own[w]:
+                    self.score += sign * weights[other[w]]
+                own[w] += change
+                if not own[w]:
+                    self.score -= sign * weights[other[w]]
+            else:
+                self.score -= sign * weights[own[w]]
+                own[w] += change
+                self.score += sign * weights[own[w]]
+                if own[w] == self.game.k:
+                    self.winner = player
+
+    def evaluate(self):
+        """
+        Returns the heuristic score for the player to move: the value
+        of each line only one player can still complete, by how many of
+        its cells they hold, theirs counting for and the other's against.
+        """
+        return self.score if self.to_move() == X else -self.score
@@ -0,0 +1,131 @@
+"""
+Parallel root-split search
+"""
+import math
+
+import tictactoe as ttt
+
+
+def minimax(board, executor, split_depth=1):
+    """
+    Returns the same action as tictactoe.minimax, with the positions
+    `split_depth` moves ahead valued in parallel on `executor`, a
+    concurrent.futures executor. Each worker fills its own
+    transposition table, and the tables are merged into this
+    process's table as results arrive.
+    """
+    if ttt.terminal(board):
+        return None
+
+    paths = move_paths(board, split_depth)
+    boards = [play(board, path) for path in paths]
+    values = {}
+    for path, (value, table) in zip(paths, executor.map(position_value, boards)):
+        values[path] = value
+        merge_table(table)
+
+    def path_value(path, position):
+        if path in values:
+            return values[path]
+        children = [path_value(path + (action,), ttt.result(position, action))
+                    for action in ttt.actions(position)]
+        return max(children) if ttt.player(position) == ttt.X else min(children)
+
+    # Choose as minimax_max_player and minimax_min_player do: the first
+    # action in actions() order with the best value
+    maximizing = ttt.player(board) == ttt.X
+    best_value = -math.inf if maximizing else math.inf
+    best_action = None
+    for action in ttt.actions(board):
+        value = path_value((action,), ttt.result(board, action))
+        if value > best_value if maximizing else value < best_value:
+            best_value = value
+            best_action = action
+    return best_action
+
+
+def move_paths(board, depth):
+    """
+    Returns the sequences of up to `depth` actions from `board`, in
+    actions() order, stopping early at terminal positions.
+    """
+    if depth == 0 or ttt.terminal(board):
+        return [()]
+    return [(action,) + path
+            for action in ttt.actions(board)
+            for path in move_paths(ttt.result(board, action), depth - 1)]
+
+
+def play(board, path):
+    for action in path:
+        board = ttt.result(board, action)
+    return board
+
+
+def position_value(board):
+    """
+    Returns the minimax value of a board and this process's
+    transposition table, for merging.
+    """
+    return ttt.value(board), bytes(ttt.table)
+
+
+def merge_table(table):
+    """
+    Adds the values known to another table to this process's table.
+    Both hold exact values, so they agree wherever both know one.
+    """
+    for code, entry in enumerate(table):
+        if entry and not ttt.table[code]:
+            ttt.table[code] = entry
+
+
+def search(game, board, depth, executor, split_depth=1):
+    """
+    Returns the same (value, action) as game.search(board, depth) for
+    an MNKGame, searching the subtrees after the first `split_depth`
+    moves in parallel on `executor`.
+
+    With one split move, the first root move is searched alone so
+    the others can be searched with its value as a bound, as the
+    sequential search does. With two, every reply is searched at once
+    with a full window, keeping more workers busy but pruning less.
+    """
+    moves = game.root_moves(board)
+    if split_depth == 1 or depth < 3:
+        best = -executor.submit(
+            move_value, game, board, moves[:1], depth - 1
+        ).result()
+        bounds = list(executor.map(
+            move_value,
+            *zip(*[(game, board, [cell], depth - 1, -math.inf, -best)
+                   for cell in moves[1:]])
+        )) if len(moves) > 1 else []
+        values = [best] + [-bound for bound in bounds]
+    else:
+        # Every root move with each reply, or alone if there are none
+        groups = []
+        for cell in moves:
+            replies = game.root_moves(board, [cell])
+            groups.append([[cell, reply] for reply in replies] or [[cell]])
+        tasks = [task for group in groups for task in group]
+        results = iter(executor.map(
+            move_value,
+            *zip(*[(game, board, task, depth - len(task)) for task in tasks])
+        ))
+        values = []
+        for group in groups:
+            group_values = [next(results) for _ in group]
+            if len(group[0]) == 1:
+                values.append(-group_values[0])
+            else:
+                # The opponent picks the reply worst for the player
+                values.append(min(group_values))
+
+    # The first root move with the best value, as search_root chooses
+    best = max(values)
+    return best, divmod(moves[values.index(best)], game.n)
+
+
+def move_value(game, board, moves, depth, alpha=-math.inf, beta=math.inf):
+    return game.value(board, moves, depth, alpha, beta)
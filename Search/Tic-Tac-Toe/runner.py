@@ -1,8 +1,22 @@
 import pygame
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
+from mnk import MNKGame
+
+# python runner.py [m n k] plays k in a row on an m x n board
+if len(sys.argv) == 4:
+    game = MNKGame(*map(int, sys.argv[1:]))
+    name = f"{game.k} in a Row ({game.m}x{game.n})"
+elif len(sys.argv) == 1:
+    # Read or build the table of every position's value, so AI moves
+    # are table lookups
+    ttt.load_table()
+    game = ttt
+    name = "Tic-Tac-Toe"
+else:
+    sys.exit("Usage: python runner.py [m n k]")
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,17 +29,47 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Frames per second while waiting for input or the AI
+FPS = 30
+clock = pygame.time.Clock()
+
+# The AI thinks on a worker thread so the window keeps responding
+executor = ThreadPoolExecutor(max_workers=1)
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = game.initial_state()
+ai_move = None
+
+# Fit the board between the title and the button below it
+rows, cols = len(board), len(board[0])
+board_top = 60
+tile_size = min(80, (height - board_top - 70) // rows, (width - 40) // cols)
+button_top = board_top + rows * tile_size + 10
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+
+
+def cancel_ai_move():
+    """
+    Stops waiting for the AI. A search that has already started runs
+    on in the background and its move is ignored.
+    """
+    global ai_move
+    if ai_move is not None:
+        ai_move.cancel()
+        ai_move = None
+
 
 while True:
 
+    click = None
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai_move()
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            click = event.pos
 
     screen.fill(black)
 
@@ -33,7 +77,7 @@ while True:
     if user is None:
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
+        title = largeFont.render(f"Play {name}", True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
@@ -54,26 +98,20 @@ while True:
         screen.blit(playO, playORect)
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
-                user = ttt.X
-            elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
-                user = ttt.O
+        if click is not None:
+            if playXButton.collidepoint(click):
+                user = game.X
+            elif playOButton.collidepoint(click):
+                user = game.O
 
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size), board_top)
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -81,7 +119,7 @@ while True:
                 )
                 pygame.draw.rect(screen, white, rect, 3)
 
-                if board[i][j] != ttt.EMPTY:
+                if board[i][j] != game.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
@@ -89,12 +127,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -102,45 +140,41 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = pygame.time.get_ticks() // 400 % 3 + 1
+            title = f"Computer thinking{'.' * dots}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Start the AI's move, or make it once it is ready
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = executor.submit(game.minimax, board)
+            elif ai_move.done():
+                board = game.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and user == player and not game_over:
-            mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
-                    if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
-
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
+        if click is not None and user == player and not game_over:
+            for i in range(rows):
+                for j in range(cols):
+                    if (board[i][j] == game.EMPTY and tiles[i][j].collidepoint(click)):
+                        board = game.result(board, (i, j))
+
+        # Offer to start over once the game ends, or while the AI thinks
+        if game_over or ai_move is not None:
+            againButton = pygame.Rect(width / 3, button_top, width / 3, 50)
+            again = mediumFont.render("Play Again" if game_over else "Cancel",
+                                      True, black)
             againRect = again.get_rect()
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
             screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+            if click is not None and againButton.collidepoint(click):
+                cancel_ai_move()
+                user = None
+                board = game.initial_state()
 
     pygame.display.flip()
+    clock.tick(FPS)
@@ -3,11 +3,51 @@ Tic Tac Toe Player
 """
 import copy
 import math
+import os
 
 X = "X"
 O = "O"
 EMPTY = None
 
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "tictactoe.table")
+TABLE_MAGIC = b"TTTTABL1"
+
+# Base-3 digit of each mark in a board code
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+
+# The 8 symmetries of the board, as the cell (row * 3 + col) each
+# cell of the transformed board is taken from
+SYMMETRIES = [
+    [3 * transform(i, j)[0] + transform(i, j)[1]
+     for i in range(3) for j in range(3)]
+    for transform in (
+        lambda i, j: (i, j),
+        lambda i, j: (2 - j, i),
+        lambda i, j: (2 - i, 2 - j),
+        lambda i, j: (j, 2 - i),
+        lambda i, j: (i, 2 - j),
+        lambda i, j: (2 - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (2 - j, 2 - i),
+    )
+]
+
+# Cells in the order alpha-beta tries them: center, corners, edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# The last move that caused a cutoff at each ply, tried first by
+# alpha-beta since it often refutes sibling positions too
+killers = [None] * 10
+
+# Positions visited by alphabeta(), for measuring pruning
+nodes = 0
+
+# Transposition table shared by every search: the minimax value plus 2
+# of each position, indexed by its canonical code, or 0 if unknown
+table = bytearray(3 ** 9)
+
 
 def initial_state():
     """
@@ -66,64 +106,55 @@ def result(board, action):
     return copy_board
 
 
-def check_horizontals(board):
-    for row in board:
-        row_total = 0
+def line_winner(cells):
+    """
+    Returns the player holding every cell of a line, if there is one.
+    """
+    total = 0
+    for cell in cells:
+        if cell == X:
+            total += 1
+        elif cell == O:
+            total += 10
+        else:
+            return None
+
+    if total == len(cells):
+        return X
+    elif total == 10 * len(cells):
+        return O
 
-        for col in row:
-            if col == EMPTY:
-                break
-            elif col == X:
-                row_total += 1
-            elif col == O:
-                row_total += 10
+    return None
 
-        if row_total == 3:
-            return X
-        elif row_total == 30:
-            return O
+
+def check_horizontals(board):
+    for row in board:
+        line = line_winner(row)
+        if line is not None:
+            return line
 
     return None
 
 
 def check_verticals(board):
     for i in range(len(board[0])):
-        col_total = 0
-        for j in range(len(board)):
-            if board[j][i] == X:
-                col_total += 1
-            elif board[j][i] == O:
-                col_total += 10
-
-        if col_total == 3:
-            return X
-        elif col_total == 30:
-            return O
+        line = line_winner([row[i] for row in board])
+        if line is not None:
+            return line
 
     return None
 
 
 def check_diagonals(board):
-    first_diagonal = 0
-    second_diagonal = 0
-
-    for i in range(len(board)):
-        if board[i][i] == X:
-            first_diagonal += 1
-        elif board[i][i] == O:
-            first_diagonal += 10
-
-        if board[2-i][i] == X:
-            second_diagonal += 1
-        elif board[2-i][i] == O:
-            second_diagonal += 10
+    # Only a square board has diagonals spanning it
+    size = len(board)
+    if any(len(row) != size for row in board):
+        return None
 
-    if first_diagonal == 3 or second_diagonal == 3:
-        return X
-    elif first_diagonal == 30 or second_diagonal == 30:
-        return O
-
-    return None
+    first_diagonal = line_winner([board[i][i] for i in range(size)])
+    if first_diagonal is not None:
+        return first_diagonal
+    return line_winner([board[size - 1 - i][i] for i in range(size)])
 
 
 def winner(board):
@@ -171,6 +202,66 @@ def utility(board):
     return 0
 
 
+def canonical(board):
+    """
+    Returns the smallest base-3 code of the board under its 8
+    symmetries, so that symmetric positions share one code.
+    """
+    cells = [DIGITS[cell] for row in board for cell in row]
+    smallest = None
+    for symmetry in SYMMETRIES:
+        code = 0
+        for i in symmetry:
+            code = code * 3 + cells[i]
+        if smallest is None or code < smallest:
+            smallest = code
+    return smallest
+
+
+def value(board):
+    """
+    Returns the minimax value of the board, looking it up in the
+    transposition table and storing it there once computed.
+    """
+    code = canonical(board)
+    if table[code]:
+        return table[code] - 2
+
+    if terminal(board):
+        board_value = utility(board)
+    elif player(board) == X:
+        board_value = max(value(result(board, action)) for action in actions(board))
+    else:
+        board_value = min(value(result(board, action)) for action in actions(board))
+
+    table[code] = board_value + 2
+    return board_value
+
+
+def load_table(filename=TABLE_FILE):
+    """
+    Fills the transposition table with every position of the game,
+    read from `filename` if it holds a saved table and otherwise
+    computed from the initial state and saved there.
+    """
+    try:
+        with open(filename, "rb") as f:
+            contents = f.read()
+        if contents[:len(TABLE_MAGIC)] == TABLE_MAGIC \
+                and len(contents) == len(TABLE_MAGIC) + len(table):
+            table[:] = contents[len(TABLE_MAGIC):]
+            return
+    except OSError:
+        pass
+
+    value(initial_state())
+    try:
+        with open(filename, "wb") as f:
+            f.write(TABLE_MAGIC + table)
+    except OSError:
+        pass
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
@@ -190,12 +281,11 @@ def minimax_min_player(board):
     if terminal(board):
         return (utility(board), None)
 
-    next_player = player(board)
     lowest_utility = float('inf')
     lowest_action = None
 
     for action in actions(board):
-        action_result = minimax_max_player(result(board, action))[0]
+        action_result = value(result(board, action))
         if action_result < lowest_utility:
             lowest_action = action
             lowest_utility = action_result
@@ -206,15 +296,77 @@ def minimax_max_player(board):
     if terminal(board):
         return (utility(board), None)
 
-    next_player = player(board)
     highest_utility = float('-inf')
     highest_action = None
 
     for action in actions(board):
-        action_result = minimax_min_player(result(board, action))[0]
+        action_result = value(result(board, action))
         if action_result > highest_utility:
             highest_action = action
             highest_utility = action_result
 
     return (highest_utility, highest_action)
 
+
+def minimax_alphabeta(board):
+    """
+    Returns the same action as minimax, searching with alpha-beta
+    pruning instead of the transposition table.
+    """
+    if terminal(board):
+        return None
+
+    # Move ordering changes which of several equally good actions a
+    # search finds, so take the first one in actions() order, as
+    # minimax does, checking each with a null-window search
+    best = alphabeta(board)
+    maximizing = player(board) == X
+    for action in actions(board):
+        child = result(board, action)
+        if maximizing and alphabeta(child, best - 1, best) >= best:
+            return action
+        if not maximizing and alphabeta(child, best, best + 1) <= best:
+            return action
+
+
+def alphabeta(board, alpha=-1, beta=1):
+    """
+    Returns the minimax value of the board if it lies strictly between
+    `alpha` and `beta`, and otherwise a bound beyond the same side.
+    The remaining moves of a position are skipped once they can no
+    longer matter, so a win found for the player to move ends the
+    search of their other moves.
+    """
+    global nodes
+    nodes += 1
+    if terminal(board):
+        return utility(board)
+
+    ply = sum(cell is not EMPTY for row in board for cell in row)
+    maximizing = player(board) == X
+    best = -math.inf if maximizing else math.inf
+    for action in ordered_actions(board, killers[ply]):
+        action_result = alphabeta(result(board, action), alpha, beta)
+        if maximizing:
+            best = max(best, action_result)
+            alpha = max(alpha, action_result)
+        else:
+            best = min(best, action_result)
+            beta = min(beta, action_result)
+        if alpha >= beta:
+            killers[ply] = action
+            break
+    return best
+
+
+def ordered_actions(board, killer=None):
+    """
+    Returns the available actions, the killer move first if it is
+    available, then the center, corners and edges.
+    """
+    ordered = [action for action in MOVE_ORDER
+               if board[action[0]][action[1]] == EMPTY]
+    if killer in ordered:
+        ordered.remove(killer)
+        ordered.insert(0, killer)
+    return ordered